@@ -1,26 +1,206 @@
 # app.py
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash
+from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, stream_with_context, abort
+from flask.json.provider import DefaultJSONProvider
+import atexit
 import os
-import json
+import io
+import csv
 import threading
 import time
+import queue
+import hashlib
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-import pandas as pd
-import sqlite3
+import orjson
+from flask_caching import Cache
+from flask_compress import Compress
 
 # Import our custom modules
 from web_crawler import WebCrawler
 from database_manager import DatabaseManager
 
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    JSON provider that serializes responses with orjson.
+    
+    Calls that pass json module options, such as the session serializer's
+    object_hook, go to the default provider, which honors them.
+    """
+    
+    option = orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY
+    
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=str, option=self.option).decode()
+    
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        # Hand orjson's bytes straight to the response without decoding
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=str, option=self.option),
+            mimetype="application/json"
+        )
+
 app = Flask(__name__)
 app.secret_key = os.urandom(24)
+app.json = OrjsonProvider(app)
+
+# Cache for expensive read-only endpoints
+cache = Cache(app, config={'CACHE_TYPE': 'SimpleCache', 'CACHE_DEFAULT_TIMEOUT': 60})
+
+# Gzip JSON and CSV responses. Flask-Compress buffers streamed bodies before
+# compressing them, so streamed exports are gzipped chunk by chunk by
+# _streamed_response instead.
+app.config['COMPRESS_MIMETYPES'] = ['application/json', 'text/csv']
+app.config['COMPRESS_STREAMS'] = False
+Compress(app)
 
 # Initialize database
 db_manager = DatabaseManager(db_type="sqlite", connection_params={"db_path": "crawler_data.db"})
+atexit.register(db_manager.close)
+
+# Upper bounds for client-supplied row counts and crawl depth
+MAX_ROWS = int(os.getenv('MAX_ROWS', 10000))
+MAX_CRAWL_DEPTH = int(os.getenv('MAX_CRAWL_DEPTH', 10))
 
-# Store active crawlers
+# Store active crawlers as job_id -> (crawler, future)
 active_crawlers = {}
-crawl_status = {}
+
+# Shared pool for crawl jobs; submissions beyond the worker count wait in line
+crawl_executor = ThreadPoolExecutor(max_workers=int(os.getenv('CRAWL_WORKERS', 4)))
+
+# Job status, guarded by status_lock and capped at MAX_JOBS entries
+MAX_JOBS = 1000
+status_lock = threading.Lock()
+crawl_status = OrderedDict()
+
+# Status updates pushed to Server-Sent Events subscribers: job_id -> set of
+# per-subscriber queues, guarded by status_lock
+status_events = {}
+
+# Each open status stream holds one server thread for the job's lifetime. The
+# app is served with the server_threads config value (8 by default; waitress
+# itself defaults to 4), so only this many streams are served at once and
+# further pages fall back to polling
+MAX_STATUS_STREAMS = int(os.getenv('STATUS_STREAMS', 4))
+status_stream_slots = threading.BoundedSemaphore(MAX_STATUS_STREAMS)
+
+def _evict_completed_jobs():
+    """Drop the oldest completed jobs once more than MAX_JOBS are tracked."""
+    excess = len(crawl_status) - MAX_JOBS
+    if excess > 0:
+        completed = [job_id for job_id, status in crawl_status.items() if status.get('completed')]
+        for job_id in completed[:excess]:
+            del crawl_status[job_id]
+
+def _update_status(job_id, **changes):
+    """Apply changes to a job's status and publish the new snapshot."""
+    with status_lock:
+        if job_id not in crawl_status:
+            crawl_status[job_id] = {}
+            _evict_completed_jobs()
+        status = crawl_status[job_id]
+        status.update(changes)
+        snapshot = dict(status)
+        subscribers = list(status_events.get(job_id, ()))
+    
+    for events in subscribers:
+        events.put(snapshot)
+
+def job_status_snapshot(job_id):
+    """Return a copy of a job's status, or None if the job is unknown."""
+    with status_lock:
+        status = crawl_status.get(job_id)
+        return dict(status) if status is not None else None
+
+def all_job_statuses():
+    """Return a consistent copy of every tracked job's status."""
+    with status_lock:
+        return OrderedDict((job_id, dict(status)) for job_id, status in crawl_status.items())
+
+# Query parameters accepted by the data endpoints, mapped to get_data keywords.
+# url_filter is an exact match, url_prefix is served from the url index and
+# url_contains is a slower substring scan.
+URL_FILTER_PARAMS = {'url_filter': 'url', 'url_prefix': 'url_prefix', 'url_contains': 'url_contains'}
+
+def _url_filters():
+    """Read the URL filter query parameters as get_data keyword arguments."""
+    return {kwarg: request.args.get(param) or None for param, kwarg in URL_FILTER_PARAMS.items()}
+
+def parse_int(name, default, lo=0, hi=MAX_ROWS, source=None):
+    """
+    Read an integer request parameter and clamp it to a range.
+    
+    Args:
+        name (str): Parameter name
+        default (int): Value used when the parameter is missing
+        lo (int): Smallest accepted value
+        hi (int): Largest accepted value
+        source: Mapping to read from (defaults to request.args)
+        
+    Returns:
+        int: Clamped value; aborts with 400 if the value is not an integer
+    """
+    if source is None:
+        source = request.args
+    try:
+        value = int(source.get(name, default))
+    except (TypeError, ValueError):
+        abort(400, description=f"Parameter '{name}' must be an integer")
+    return max(lo, min(value, hi))
+
+def _gzip_chunks(chunks, level):
+    """Gzip a stream of str/bytes chunks incrementally, in constant memory."""
+    # wbits=31 writes a gzip header and trailer around the deflate stream
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode() if isinstance(chunk, str) else chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def _streamed_response(chunks, mimetype):
+    """
+    Build a streamed response, gzipped on the fly when the client accepts it.
+    
+    Args:
+        chunks: Iterable of str chunks, usually a generator
+        mimetype: Response content type
+    """
+    gzip = request.accept_encodings.quality('gzip') > 0
+    if gzip:
+        chunks = _gzip_chunks(chunks, app.config.get('COMPRESS_LEVEL', 6))
+    
+    response = app.response_class(
+        response=stream_with_context(chunks),
+        status=200,
+        mimetype=mimetype
+    )
+    response.vary.add('Accept-Encoding')
+    if gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+def _etag_matches(etag):
+    """
+    Check whether the client's If-None-Match already names etag.
+    
+    Flask-Compress rewrites the ETag of a compressed response to "<etag>:gzip"
+    (or ":br"/":deflate") and browsers send that form back, so the encoding
+    suffix is ignored when comparing.
+    """
+    if_none_match = request.if_none_match
+    if if_none_match.star_tag:
+        return True
+    return any(tag.partition(':')[0] == etag for tag in if_none_match.as_set(include_weak=True))
 
 @app.route('/')
 def index():
@@ -30,9 +210,10 @@ def index():
 @app.route('/start_crawl', methods=['POST'])
 def start_crawl():
     """Start a new crawl job."""
+    # Outside the try below so a bad value returns 400 instead of a flash
+    max_depth = parse_int('max_depth', 3, lo=1, hi=MAX_CRAWL_DEPTH, source=request.form)
     try:
         start_url = request.form.get('start_url')
-        max_depth = int(request.form.get('max_depth', 3))
         use_selenium = request.form.get('use_selenium') == 'on'
         restrict_domain = request.form.get('restrict_domain') == 'on'
         
@@ -53,47 +234,61 @@ def start_crawl():
         
         # Initialize crawler
         crawler = WebCrawler(database_manager=db_manager, use_selenium=use_selenium)
-        active_crawlers[job_id] = crawler
         
         # Initialize status
-        crawl_status[job_id] = {
-            'start_time': datetime.now().isoformat(),
-            'status': 'running',
-            'start_url': start_url,
-            'max_depth': max_depth,
-            'pages_crawled': 0,
-            'errors': 0,
-            'completed': False
-        }
+        _update_status(
+            job_id,
+            start_time=datetime.now().isoformat(),
+            status='queued',
+            start_url=start_url,
+            max_depth=max_depth,
+            pages_crawled=0,
+            errors=0,
+            completed=False
+        )
         
-        # Start crawling in a separate thread
+        def on_progress(pages_crawled):
+            _update_status(job_id, pages_crawled=pages_crawled)
+        
+        # Crawl on a pooled worker thread
         def crawl_task():
             try:
+                _update_status(job_id, status='running')
                 data = crawler.crawl(
                     start_url=start_url,
                     max_depth=max_depth,
                     selectors=selectors,
-                    restrict_domain=restrict_domain
+                    restrict_domain=restrict_domain,
+                    progress_callback=on_progress
                 )
                 
                 # Update status when complete
-                crawl_status[job_id]['status'] = 'completed'
-                crawl_status[job_id]['pages_crawled'] = len(crawler.visited_urls)
-                crawl_status[job_id]['completed'] = True
-                crawl_status[job_id]['end_time'] = datetime.now().isoformat()
+                _update_status(
+                    job_id,
+                    status='stopped' if crawler.stopped else 'completed',
+                    pages_crawled=len(crawler.visited_urls),
+                    completed=True,
+                    end_time=datetime.now().isoformat()
+                )
+                
+                # New pages change the stats key; drop stale entries
+                cache.delete_memoized(_cached_stats)
                 
             except Exception as e:
-                crawl_status[job_id]['status'] = 'error'
-                crawl_status[job_id]['error_message'] = str(e)
-                crawl_status[job_id]['errors'] += 1
-                crawl_status[job_id]['completed'] = True
-                crawl_status[job_id]['end_time'] = datetime.now().isoformat()
+                _update_status(
+                    job_id,
+                    status='error',
+                    error_message=str(e),
+                    errors=job_status_snapshot(job_id)['errors'] + 1,
+                    completed=True,
+                    end_time=datetime.now().isoformat()
+                )
             finally:
                 crawler.close()
                 
-        thread = threading.Thread(target=crawl_task)
-        thread.daemon = True
-        thread.start()
+        future = crawl_executor.submit(crawl_task)
+        active_crawlers[job_id] = (crawler, future)
+        future.add_done_callback(lambda _: active_crawlers.pop(job_id, None))
         
         flash(f'Crawl job started with ID: {job_id}', 'success')
         return redirect(url_for('job_status', job_id=job_id))
@@ -105,32 +300,90 @@ def start_crawl():
 @app.route('/job_status/<job_id>')
 def job_status(job_id):
     """Show status of a specific job."""
-    if job_id not in crawl_status:
+    status = job_status_snapshot(job_id)
+    if status is None:
         flash(f'Job {job_id} not found', 'error')
         return redirect(url_for('index'))
         
-    return render_template('job_status.html', job_id=job_id, status=crawl_status[job_id])
+    return render_template('job_status.html', job_id=job_id, status=status)
 
 @app.route('/api/job_status/<job_id>')
 def api_job_status(job_id):
     """API endpoint to get job status."""
-    if job_id not in crawl_status:
+    status = job_status_snapshot(job_id)
+    if status is None:
         return jsonify({'error': 'Job not found'}), 404
         
-    return jsonify(crawl_status[job_id])
+    return jsonify(status)
+
+@app.route('/api/job_status/<job_id>/stream')
+def api_job_status_stream(job_id):
+    """Stream job status updates as Server-Sent Events."""
+    status = job_status_snapshot(job_id)
+    if status is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    def generate():
+        # Claimed inside the generator so the finally below always releases it
+        if not status_stream_slots.acquire(blocking=False):
+            yield "event: poll\ndata: {}\n\n"
+            return
+        
+        # Every subscriber gets its own queue, so each one sees every update
+        events = queue.Queue()
+        with status_lock:
+            status_events.setdefault(job_id, set()).add(events)
+        try:
+            status = job_status_snapshot(job_id) or {'completed': True}
+            yield f"data: {orjson.dumps(status).decode()}\n\n"
+            while not status.get('completed'):
+                try:
+                    status = events.get(timeout=15)
+                except queue.Empty:
+                    # Keep the connection open and pick up any missed completion;
+                    # a write to a closed connection also ends the stream here
+                    status = job_status_snapshot(job_id) or {'completed': True}
+                    if not status.get('completed'):
+                        yield ": keepalive\n\n"
+                        continue
+                yield f"data: {orjson.dumps(status).decode()}\n\n"
+        finally:
+            with status_lock:
+                subscribers = status_events.get(job_id)
+                if subscribers is not None:
+                    subscribers.discard(events)
+                    if not subscribers:
+                        del status_events[job_id]
+            status_stream_slots.release()
+    
+    response = app.response_class(
+        response=stream_with_context(generate()),
+        status=200,
+        mimetype='text/event-stream'
+    )
+    response.headers["Cache-Control"] = "no-cache"
+    return response
 
 @app.route('/stop_job/<job_id>')
 def stop_job(job_id):
     """Stop a running job."""
     if job_id in active_crawlers:
         try:
-            crawler = active_crawlers[job_id]
-            crawler.close()
+            crawler, future = active_crawlers[job_id]
+            if future.cancel():
+                # The job never started, so crawl_task won't close the crawler
+                crawler.close()
+            else:
+                # crawl() returns after its in-flight pages; crawl_task then closes it
+                crawler.stop()
             
             # Update status
-            crawl_status[job_id]['status'] = 'stopped'
-            crawl_status[job_id]['completed'] = True
-            crawl_status[job_id]['end_time'] = datetime.now().isoformat()
+            _update_status(
+                job_id,
+                status='stopped',
+                completed=True,
+                end_time=datetime.now().isoformat()
+            )
             
             flash(f'Job {job_id} stopped successfully', 'success')
         except Exception as e:
@@ -143,54 +396,100 @@ def stop_job(job_id):
 @app.route('/jobs')
 def list_jobs():
     """List all jobs."""
-    return render_template('jobs.html', jobs=crawl_status)
+    return render_template('jobs.html', jobs=all_job_statuses())
+
+@app.route('/api/jobs')
+def api_jobs():
+    """API endpoint to get all jobs."""
+    # Pollers get a 304 until some job's status changes
+    response = jsonify(all_job_statuses())
+    etag = hashlib.md5(response.get_data()).hexdigest()
+    if _etag_matches(etag):
+        return '', 304
+    
+    response.set_etag(etag)
+    return response
 
 @app.route('/data')
 def data_explorer():
     """Explore crawled data."""
     # Get filter parameters
-    url_filter = request.args.get('url_filter', '')
-    limit = int(request.args.get('limit', 100))
+    limit = parse_int('limit', 100)
+    filters = {param: request.args.get(param, '') for param in URL_FILTER_PARAMS}
     
     # Get data from database
-    data = db_manager.get_data(url=url_filter if url_filter else None, limit=limit)
+    data = db_manager.get_data(limit=limit, **_url_filters())
     
-    return render_template('data_explorer.html', data=data, url_filter=url_filter, limit=limit)
+    return render_template('data_explorer.html', data=data, filters=filters, limit=limit)
 
 @app.route('/api/data')
 def api_data():
     """API endpoint to get crawled data."""
-    url_filter = request.args.get('url_filter', '')
-    limit = int(request.args.get('limit', 100))
+    limit = parse_int('limit', 100)
+    filters = _url_filters()
     
-    data = db_manager.get_data(url=url_filter if url_filter else None, limit=limit)
-    return jsonify(data)
+    # The rows only change when a save bumps the data version
+    total_pages, latest_date = db_manager.get_data_version()
+    etag = hashlib.md5(f"{total_pages}:{latest_date}:{limit}:{sorted(filters.items())}".encode()).hexdigest()
+    if _etag_matches(etag):
+        return '', 304
+    
+    batches = db_manager.iter_json_batches(limit=limit, **filters)
+    
+    def generate():
+        # Rows are already JSON; join them into an array without decoding
+        yield '['
+        separator = ''
+        for batch in batches:
+            yield separator + ','.join(batch)
+            separator = ','
+        yield ']'
+    
+    response = _streamed_response(generate(), 'application/json')
+    # Tag the gzip body the way Flask-Compress does; _etag_matches accepts both forms
+    response.set_etag(f"{etag}:gzip" if response.content_encoding == 'gzip' else etag)
+    return response
 
 @app.route('/export/<format>')
 def export_data(format):
     """Export crawled data in CSV or JSON format."""
-    url_filter = request.args.get('url_filter', '')
-    limit = int(request.args.get('limit', 1000))
-    
-    data = db_manager.get_data(url=url_filter if url_filter else None, limit=limit)
+    limit = parse_int('limit', 1000)
     
     if format.lower() == 'csv':
-        # Convert to DataFrame and then to CSV
-        df = pd.DataFrame(data)
-        csv_data = df.to_csv(index=False)
+        filters = _url_filters()
+        # The header is the union of every exported row's keys, not just the first row's
+        fieldnames = db_manager.get_field_names(limit=limit, **filters)
+        batches = db_manager.iter_batches(limit=limit, **filters)
+        
+        def generate():
+            # Write one chunk per cursor batch
+            buffer = io.StringIO()
+            # Ignore only keys of rows saved after the header was read
+            writer = csv.DictWriter(buffer, fieldnames=fieldnames, extrasaction='ignore')
+            header_written = False
+            for batch in batches:
+                if not header_written:
+                    writer.writeheader()
+                    header_written = True
+                writer.writerows(batch)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
         
         # Prepare response
-        response = app.response_class(
-            response=csv_data,
-            status=200,
-            mimetype='text/csv'
-        )
+        response = _streamed_response(generate(), 'text/csv')
         response.headers["Content-Disposition"] = "attachment; filename=crawler_data.csv"
         return response
         
     elif format.lower() == 'json':
-        # Convert to JSON
-        json_data = json.dumps(data, indent=2, default=str)
+        data = db_manager.get_data(limit=limit, **_url_filters())
+        
+        # Programmatic clients can ask for the compact body inline
+        if request.args.get('download', '1') == '0':
+            return jsonify(data)
+        
+        # Pretty-print only the downloadable file
+        json_data = orjson.dumps(data, default=str, option=orjson.OPT_INDENT_2)
         
         # Prepare response
         response = app.response_class(
@@ -213,48 +512,25 @@ def visualize_data():
 @app.route('/api/stats')
 def api_stats():
     """API endpoint to get statistics about crawled data."""
-    # Get statistics from database
-    conn = sqlite3.connect(db_manager.connection_params.get("db_path", "crawler_data.db"))
-    cursor = conn.cursor()
-    
-    stats = {}
-    
-    # Total number of pages crawled
-    cursor.execute("SELECT COUNT(*) FROM crawled_pages")
-    stats['total_pages'] = cursor.fetchone()[0]
+    filters = _url_filters()
     
-    # Top domains
-    cursor.execute("""
-    SELECT 
-        substr(url, instr(url, '://') + 3, 
-            case 
-                when instr(substr(url, instr(url, '://') + 3), '/') = 0 
-                then length(substr(url, instr(url, '://') + 3)) 
-                else instr(substr(url, instr(url, '://') + 3), '/') - 1 
-            end
-        ) as domain,
-        COUNT(*) as count
-    FROM crawled_pages
-    GROUP BY domain
-    ORDER BY count DESC
-    LIMIT 10
-    """)
-    stats['top_domains'] = [{'domain': row[0], 'count': row[1]} for row in cursor.fetchall()]
+    # Key the cached stats and the ETag on a cheap change marker
+    total_pages, latest_date = db_manager.get_data_version()
+    etag = hashlib.md5(f"{total_pages}:{latest_date}:{sorted(filters.items())}".encode()).hexdigest()
+    if _etag_matches(etag):
+        return '', 304
     
-    # Crawl activity over time
-    cursor.execute("""
-    SELECT 
-        substr(crawl_date, 1, 10) as date,
-        COUNT(*) as count
-    FROM crawled_pages
-    GROUP BY date
-    ORDER BY date
-    """)
-    stats['activity_by_date'] = [{'date': row[0], 'count': row[1]} for row in cursor.fetchall()]
-    
-    conn.close()
-    
-    return jsonify(stats)
+    response = jsonify(_cached_stats(total_pages, latest_date, **filters))
+    response.set_etag(etag)
+    return response
+
+@cache.memoize(timeout=60)
+def _cached_stats(total_pages, latest_date, url=None, url_prefix=None, url_contains=None):
+    """Compute statistics once per (total_pages, latest_date, filters) key."""
+    return db_manager.get_stats(url=url, url_prefix=url_prefix, url_contains=url_contains)
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    from waitress import serve
+    from config import config
+    # Local-only by default, like the Flask development server used before
+    serve(app, host='127.0.0.1', port=5000, threads=config.get("server_threads", 8))
\ No newline at end of file
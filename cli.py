@@ -1,36 +1,182 @@
 # cli.py
 import argparse
+import atexit
+import functools
 import logging
+import logging.handlers
 import sys
 import json
 import os
+import re
 
-# Import our custom modules
-from web_crawler import WebCrawler
-from database_manager import DatabaseManager
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Heavy modules (crawler, database, utilities) are imported inside the
+# commands that use them so that e.g. `config` and `--help` start quickly
 from config import config
-from crawler_utils import normalize_url, generate_site_report
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# http(s) URL with a host and no whitespace, used to pre-filter URLs before fetching
+_URL_RE = re.compile(r'^https?://[^\s/$.?#][^\s]*\Z', re.IGNORECASE)
+
+# Per-command loggers
+crawl_logger = logging.getLogger("crawl")
+analyze_logger = logging.getLogger("analyze")
+server_logger = logging.getLogger("server")
+export_logger = logging.getLogger("export")
+screenshot_logger = logging.getLogger("screenshot")
+download_logger = logging.getLogger("download")
+config_logger = logging.getLogger("config")
+validate_logger = logging.getLogger("validate")
+
+# Handlers installed by setup_logging(), so repeat calls only adjust the level
+_log_handlers = None
+
+class BufferedFileHandler(logging.FileHandler):
+    """
+    FileHandler that writes through a large buffer and only flushes when asked.
+    
+    The stock handler flushes after every record, which costs a write() per
+    log line during long crawls.
+    """
+    
+    def __init__(self, filename, buffer_size=65536, **kwargs):
+        self.buffer_size = buffer_size
+        super().__init__(filename, **kwargs)
+    
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=self.buffer_size,
+                    encoding=self.encoding, errors=self.errors)
+    
+    def emit(self, record):
+        if self.stream is None:
+            self.stream = self._open()
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+class FlushingMemoryHandler(logging.handlers.MemoryHandler):
+    """MemoryHandler that also flushes its target once the buffer is handed over."""
+    
+    def flush(self):
+        super().flush()
+        with self.lock:
+            if self.target:
+                self.target.flush()
 
 def setup_logging(log_level="INFO"):
     """
     Set up logging configuration.
     
+    File output is buffered in memory (512 records) and on disk (64KB) and is
+    flushed on ERROR records, when the buffer fills and at interpreter exit.
+    
     Args:
         log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
     """
+    global _log_handlers
+    
     numeric_level = getattr(logging, log_level.upper(), None)
     if not isinstance(numeric_level, int):
         raise ValueError(f"Invalid log level: {log_level}")
     
+    root = logging.getLogger()
+    if _log_handlers is not None and all(h in root.handlers for h in _log_handlers):
+        root.setLevel(numeric_level)
+        return
+    
+    file_handler = BufferedFileHandler(config.get("log_file", "crawler_cli.log"))
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    
+    _log_handlers = [
+        FlushingMemoryHandler(capacity=512, flushLevel=logging.ERROR, target=file_handler),
+        logging.StreamHandler(sys.stdout)
+    ]
     logging.basicConfig(
         level=numeric_level,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=[
-            logging.FileHandler(config.get("log_file", "crawler_cli.log")),
-            logging.StreamHandler(sys.stdout)
-        ]
+        format=LOG_FORMAT,
+        handlers=_log_handlers,
+        # Importing config/web_crawler already installed default root handlers
+        force=True
     )
 
+def _write_json(path, obj):
+    """
+    Write an object to a file as indented JSON.
+    
+    Uses orjson when it is installed and falls back to the standard library.
+    
+    Args:
+        path: Output file path
+        obj: JSON-serializable object
+    """
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(obj, default=str,
+                                 option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
+        with open(path, 'w') as f:
+            json.dump(obj, f, indent=2, default=str)
+
+@functools.lru_cache(maxsize=4)
+def _cached_db_manager(db_type, params_key):
+    """Create one DatabaseManager per (db_type, connection params) pair."""
+    from database_manager import DatabaseManager
+    manager = DatabaseManager(db_type=db_type, connection_params=dict(params_key))
+    # Cached managers live until exit; close them then so buffered rows are written
+    atexit.register(manager.close)
+    return manager
+
+def _get_db_manager(db_type, connection_params):
+    """
+    Get a shared DatabaseManager so repeat commands reuse its connection.
+    
+    Args:
+        db_type: Database backend type
+        connection_params: Backend connection parameters
+        
+    Returns:
+        DatabaseManager: Shared manager for these settings
+    """
+    return _cached_db_manager(db_type, tuple(sorted(connection_params.items())))
+
+def _print_lines(lines):
+    """Print several lines to stdout with a single write."""
+    sys.stdout.write(''.join(f"{line}\n" for line in lines))
+    sys.stdout.flush()
+
+def _read_urls(path):
+    """
+    Yield the URLs listed in a file, one per line, skipping blanks and duplicates.
+    
+    Duplicates are detected on the normalized form (so http://x and http://x/
+    count once) but each URL is yielded as first written.
+    
+    Args:
+        path: Path to the URL file
+        
+    Yields:
+        str: URL
+    """
+    from crawler_utils import normalize_url
+    
+    seen = set()
+    with open(path, 'r', buffering=1 << 16) as f:
+        for line in f:
+            url = line.strip()
+            if not url:
+                continue
+            key = normalize_url(url)
+            if key in seen:
+                continue
+            seen.add(key)
+            yield url
+
 def crawl_command(args):
     """
     Execute crawl command.
@@ -39,9 +185,11 @@ def crawl_command(args):
         args: Command line arguments
     """
     setup_logging(args.log_level)
-    logger = logging.getLogger("crawl")
     
-    logger.info(f"Starting crawl of {args.url} with depth {args.depth}")
+    from web_crawler import WebCrawler
+    from crawler_utils import normalize_url, generate_site_report
+    
+    crawl_logger.info(f"Starting crawl of {args.url} with depth {args.depth}")
     
     # Set up database connection
     db_type, connection_params = config.get_database_config()
@@ -49,7 +197,7 @@ def crawl_command(args):
         # Override database type if output format is specified
         db_type = args.output_format
     
-    db_manager = DatabaseManager(db_type=db_type, connection_params=connection_params)
+    db_manager = _get_db_manager(db_type, connection_params)
     
     # Set up selectors
     selectors = {}
@@ -57,14 +205,15 @@ def crawl_command(args):
         try:
             selectors = json.loads(args.selectors)
         except json.JSONDecodeError:
-            logger.error("Invalid selectors format. Expected JSON.")
+            crawl_logger.error("Invalid selectors format. Expected JSON.")
             sys.exit(1)
     
     # Initialize crawler
     crawler = WebCrawler(
         database_manager=db_manager,
         use_selenium=args.selenium,
-        max_workers=args.workers
+        max_workers=args.workers,
+        respect_robots=config.get_crawler_config()['respect_robots_txt']
     )
     
     try:
@@ -76,7 +225,7 @@ def crawl_command(args):
             restrict_domain=not args.follow_external
         )
         
-        logger.info(f"Crawl completed. Crawled {len(crawler.visited_urls)} pages.")
+        crawl_logger.info(f"Crawl completed. Crawled {len(crawler.visited_urls)} pages.")
         
         # Generate report if requested
         if args.report:
@@ -89,15 +238,14 @@ def crawl_command(args):
             if report_path.lower() == 'true':
                 report_path = f"report_{domain.replace('.', '_')}.json"
             
-            with open(report_path, 'w') as f:
-                json.dump(report, f, indent=2)
+            _write_json(report_path, report)
             
-            logger.info(f"Report saved to {report_path}")
+            crawl_logger.info(f"Report saved to {report_path}")
         
     except KeyboardInterrupt:
-        logger.info("Crawl interrupted by user.")
+        crawl_logger.info("Crawl interrupted by user.")
     except Exception as e:
-        logger.error(f"Error during crawl: {str(e)}")
+        crawl_logger.error(f"Error during crawl: {str(e)}")
     finally:
         crawler.close()
 
@@ -109,19 +257,22 @@ def analyze_command(args):
         args: Command line arguments
     """
     setup_logging(args.log_level)
-    logger = logging.getLogger("analyze")
     
-    logger.info(f"Analyzing data for {args.domain}")
+    from crawler_utils import generate_site_report
+    
+    analyze_logger.info(f"Analyzing data for {args.domain}")
     
     # Set up database connection
     db_type, connection_params = config.get_database_config()
-    db_manager = DatabaseManager(db_type=db_type, connection_params=connection_params)
+    db_manager = _get_db_manager(db_type, connection_params)
     
     # Get data
-    data = db_manager.get_data(url=args.domain, limit=10000)
+    # The report only looks at these fields
+    data = db_manager.get_data(url=args.domain, limit=10000,
+                               fields=['content_type', 'response_time', 'status_code'])
     
     if not data:
-        logger.error(f"No data found for domain: {args.domain}")
+        analyze_logger.error(f"No data found for domain: {args.domain}")
         sys.exit(1)
     
     # Generate report
@@ -129,29 +280,27 @@ def analyze_command(args):
     
     # Save or print report
     if args.output:
-        with open(args.output, 'w') as f:
-            json.dump(report, f, indent=2)
-        logger.info(f"Analysis report saved to {args.output}")
+        _write_json(args.output, report)
+        analyze_logger.info(f"Analysis report saved to {args.output}")
     else:
         # Print report to console in a readable format
-        print(f"\n===== Analysis Report for {args.domain} =====")
-        print(f"Total pages crawled: {report['pages_crawled']}")
-        print(f"Crawl date: {report['crawl_date']}")
-        
-        print("\nContent Types:")
-        for content_type, count in report['content_types'].items():
-            print(f"  - {content_type}: {count}")
+        lines = [
+            f"\n===== Analysis Report for {args.domain} =====",
+            f"Total pages crawled: {report['pages_crawled']}",
+            f"Crawl date: {report['crawl_date']}",
+            "\nContent Types:",
+        ]
+        lines.extend(f"  - {content_type}: {count}" for content_type, count in report['content_types'].items())
         
-        print("\nResponse Times:")
-        for key, value in report['response_times'].items():
-            print(f"  - {key}: {value:.2f}s")
+        lines.append("\nResponse Times:")
+        lines.extend(f"  - {key}: {value:.2f}s" for key, value in report['response_times'].items())
         
-        print("\nStatus Codes:")
-        for status, count in report['status_codes'].items():
-            print(f"  - {status}: {count}")
+        lines.append("\nStatus Codes:")
+        lines.extend(f"  - {status}: {count}" for status, count in report['status_codes'].items())
         
-        print(f"\nErrors: {report['errors']}")
-        print("==========================================\n")
+        lines.append(f"\nErrors: {report['errors']}")
+        lines.append("==========================================\n")
+        _print_lines(lines)
 
 def server_command(args):
     """
@@ -161,30 +310,83 @@ def server_command(args):
         args: Command line arguments
     """
     setup_logging(args.log_level)
-    logger = logging.getLogger("server")
     
     # Import Flask app
     try:
         from app import app
     except ImportError:
-        logger.error("Failed to import Flask application")
+        server_logger.error("Failed to import Flask application")
         sys.exit(1)
     
-    # Update config if needed
-    if args.host:
-        config.set("host", args.host)
-    if args.port:
-        config.set("port", args.port)
-    if args.debug is not None:
-        config.set("debug", args.debug)
+    # Update config if needed, writing the file once
+    with config.batch():
+        if args.host:
+            config.set("host", args.host)
+        if args.port:
+            config.set("port", args.port)
+        if args.debug is not None:
+            config.set("debug", args.debug)
     
     # Start server
     host = config.get("host", "0.0.0.0")
     port = config.get("port", 5000)
     debug = config.get("debug", False)
     
-    logger.info(f"Starting web server on {host}:{port} (debug={debug})")
-    app.run(host=host, port=port, debug=debug)
+    server_logger.info(f"Starting web server on {host}:{port} (debug={debug})")
+    if debug:
+        # The Flask development server provides the reloader and debugger
+        app.run(host=host, port=port, debug=debug)
+    else:
+        from waitress import serve
+        serve(app, host=host, port=port, threads=config.get("server_threads", 8))
+
+def _write_csv(path, data):
+    """Write records as CSV; columns are the union of all keys, in first-seen order."""
+    import csv
+    fieldnames = list(dict.fromkeys(key for item in data for key in item))
+    with open(path, 'w', newline='', encoding='utf-8', buffering=1 << 20) as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(data)
+
+def _write_xlsx(path, data):
+    """Write records as an Excel workbook, streaming rows in write-only mode."""
+    from openpyxl import Workbook
+    fieldnames = list(dict.fromkeys(key for item in data for key in item))
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Sheet1")
+    sheet.append(fieldnames)
+    for item in data:
+        # Cells can't hold lists/dicts (multi-match selectors); store their text
+        sheet.append([
+            str(value) if isinstance(value, (list, dict)) else value
+            for value in (item.get(key) for key in fieldnames)
+        ])
+    workbook.save(path)
+
+def _write_parquet(path, data):
+    """Write records as a Parquet file; columns are the union of all keys."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    fieldnames = list(dict.fromkeys(key for item in data for key in item))
+    columns = {}
+    for key in fieldnames:
+        values = [item.get(key) for item in data]
+        types = {type(value) for value in values if value is not None}
+        # Lists/dicts (multi-match selectors) and mixed types have no single
+        # Arrow type; store such columns as JSON text
+        if len(types) > 1 or types & {list, dict}:
+            values = [None if value is None else json.dumps(value) for value in values]
+        columns[key] = values
+    pq.write_table(pa.Table.from_pydict(columns), path)
+
+# File extension -> function(path, data) used by the export command
+EXPORT_WRITERS = {
+    '.csv': _write_csv,
+    '.json': _write_json,
+    '.xlsx': _write_xlsx,
+    '.parquet': _write_parquet,
+}
 
 def export_command(args):
     """
@@ -194,13 +396,19 @@ def export_command(args):
         args: Command line arguments
     """
     setup_logging(args.log_level)
-    logger = logging.getLogger("export")
     
-    logger.info(f"Exporting data to {args.output}")
+    export_logger.info(f"Exporting data to {args.output}")
+    
+    # Determine export format
+    format_ext = os.path.splitext(args.output)[1].lower()
+    writer = EXPORT_WRITERS.get(format_ext)
+    if writer is None:
+        export_logger.error(f"Unsupported export format: {format_ext}")
+        sys.exit(1)
     
     # Set up database connection
     db_type, connection_params = config.get_database_config()
-    db_manager = DatabaseManager(db_type=db_type, connection_params=connection_params)
+    db_manager = _get_db_manager(db_type, connection_params)
     
     # Get data
     url_filter = args.filter if args.filter else None
@@ -209,28 +417,19 @@ def export_command(args):
     data = db_manager.get_data(url=url_filter, limit=limit)
     
     if not data:
-        logger.error(f"No data found to export")
+        export_logger.error(f"No data found to export")
         sys.exit(1)
     
-    # Determine export format
-    format_ext = os.path.splitext(args.output)[1].lower()
-    
-    if format_ext == '.csv':
-        import pandas as pd
-        df = pd.DataFrame(data)
-        df.to_csv(args.output, index=False)
-    elif format_ext == '.json':
-        with open(args.output, 'w') as f:
-            json.dump(data, f, indent=2)
-    elif format_ext == '.xlsx':
-        import pandas as pd
-        df = pd.DataFrame(data)
-        df.to_excel(args.output, index=False)
-    else:
-        logger.error(f"Unsupported export format: {format_ext}")
+    try:
+        writer(args.output, data)
+    except ImportError as e:
+        export_logger.error(f"Missing dependency for {format_ext} export: {str(e)}")
+        sys.exit(1)
+    except Exception as e:
+        export_logger.error(f"Error writing {args.output}: {str(e)}")
         sys.exit(1)
     
-    logger.info(f"Exported {len(data)} records to {args.output}")
+    export_logger.info(f"Exported {len(data)} records to {args.output}")
 
 def screenshot_command(args):
     """
@@ -240,9 +439,8 @@ def screenshot_command(args):
         args: Command line arguments
     """
     setup_logging(args.log_level)
-    logger = logging.getLogger("screenshot")
     
-    logger.info(f"Taking screenshot of {args.url}")
+    screenshot_logger.info(f"Taking screenshot of {args.url}")
     
     # Import utility function
     from crawler_utils import take_screenshot
@@ -261,12 +459,12 @@ def screenshot_command(args):
     try:
         screenshot_path = take_screenshot(args.url, output_path)
         if screenshot_path:
-            logger.info(f"Screenshot saved to {screenshot_path}")
+            screenshot_logger.info(f"Screenshot saved to {screenshot_path}")
         else:
-            logger.error("Failed to take screenshot")
+            screenshot_logger.error("Failed to take screenshot")
             sys.exit(1)
     except Exception as e:
-        logger.error(f"Error taking screenshot: {str(e)}")
+        screenshot_logger.error(f"Error taking screenshot: {str(e)}")
         sys.exit(1)
 
 def download_command(args):
@@ -277,7 +475,6 @@ def download_command(args):
         args: Command line arguments
     """
     setup_logging(args.log_level)
-    logger = logging.getLogger("download")
     
     from crawler_utils import download_file
     
@@ -290,24 +487,26 @@ def download_command(args):
         urls = [args.url]
     elif args.url_file:
         try:
-            with open(args.url_file, 'r') as f:
-                urls = [line.strip() for line in f if line.strip()]
+            urls = list(_read_urls(args.url_file))
         except IOError as e:
-            logger.error(f"Error reading URL file: {str(e)}")
+            download_logger.error(f"Error reading URL file: {str(e)}")
             sys.exit(1)
     else:
-        logger.error("Either URL or URL file must be specified")
+        download_logger.error("Either URL or URL file must be specified")
         sys.exit(1)
     
-    # Download files
-    success_count = 0
-    for url in urls:
-        logger.info(f"Downloading {url}")
-        file_path = download_file(url, output_dir)
-        if file_path:
-            success_count += 1
+    from concurrent.futures import ThreadPoolExecutor
+    
+    def download(url):
+        download_logger.info(f"Downloading {url}")
+        return download_file(url, output_dir)
+    
+    # Download files in parallel; each one is network-bound
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        results = list(executor.map(download, urls))
+    success_count = sum(1 for file_path in results if file_path)
     
-    logger.info(f"Downloaded {success_count} of {len(urls)} files to {output_dir}")
+    download_logger.info(f"Downloaded {success_count} of {len(urls)} files to {output_dir}")
 
 def config_command(args):
     """
@@ -317,7 +516,6 @@ def config_command(args):
         args: Command line arguments
     """
     setup_logging(args.log_level)
-    logger = logging.getLogger("config")
     
     # Get or set config
     if args.get:
@@ -333,15 +531,18 @@ def config_command(args):
         
         success = config.set(args.set, value)
         if success:
-            logger.info(f"Set {args.set} to {value}")
+            config_logger.info(f"Set {args.set} to {value}")
         else:
-            logger.error(f"Failed to set {args.set}")
+            config_logger.error(f"Failed to set {args.set}")
             sys.exit(1)
     elif args.show:
         # Print full configuration
-        print(json.dumps(config.to_dict(), indent=2))
+        if orjson is not None:
+            print(orjson.dumps(config.to_dict(), option=orjson.OPT_INDENT_2).decode())
+        else:
+            print(json.dumps(config.to_dict(), indent=2))
     else:
-        logger.error("No valid config operation specified")
+        config_logger.error("No valid config operation specified")
         sys.exit(1)
 
 def validate_command(args):
@@ -352,9 +553,8 @@ def validate_command(args):
         args: Command line arguments
     """
     setup_logging(args.log_level)
-    logger = logging.getLogger("validate")
     
-    from crawler_utils import check_urls_parallel, is_valid_url
+    from crawler_utils import check_urls_parallel
     
     # Get URLs to validate
     urls = []
@@ -362,32 +562,28 @@ def validate_command(args):
         urls = [args.url]
     elif args.url_file:
         try:
-            with open(args.url_file, 'r') as f:
-                urls = [line.strip() for line in f if line.strip()]
+            urls = list(_read_urls(args.url_file))
         except IOError as e:
-            logger.error(f"Error reading URL file: {str(e)}")
+            validate_logger.error(f"Error reading URL file: {str(e)}")
             sys.exit(1)
     else:
-        logger.error("Either URL or URL file must be specified")
+        validate_logger.error("Either URL or URL file must be specified")
         sys.exit(1)
     
     # Validate URLs
-    logger.info(f"Validating {len(urls)} URLs...")
+    validate_logger.info(f"Validating {len(urls)} URLs...")
     
     # First check URL format
     invalid_format = []
     valid_urls = []
+    is_valid = _URL_RE.match
     for url in urls:
-        if not is_valid_url(url):
-            invalid_format.append(url)
-        else:
-            valid_urls.append(url)
+        (valid_urls if is_valid(url) else invalid_format).append(url)
     
     if invalid_format:
-        logger.warning(f"Found {len(invalid_format)} URLs with invalid format")
+        validate_logger.warning(f"Found {len(invalid_format)} URLs with invalid format")
         if args.verbose:
-            for url in invalid_format:
-                print(f"Invalid format: {url}")
+            _print_lines(f"Invalid format: {url}" for url in invalid_format)
     
     # Then check accessibility
     if valid_urls:
@@ -397,23 +593,25 @@ def validate_command(args):
         redirects = [url for url, result in results.items() if result['redirect']]
         errors = [url for url, result in results.items() if not result['accessible']]
         
-        print(f"\n===== URL Validation Results =====")
-        print(f"Total URLs: {len(urls)}")
-        print(f"Invalid format: {len(invalid_format)}")
-        print(f"Accessible: {len(accessible)}")
-        print(f"Redirects: {len(redirects)}")
-        print(f"Errors/Not accessible: {len(errors)}")
+        lines = [
+            "\n===== URL Validation Results =====",
+            f"Total URLs: {len(urls)}",
+            f"Invalid format: {len(invalid_format)}",
+            f"Accessible: {len(accessible)}",
+            f"Redirects: {len(redirects)}",
+            f"Errors/Not accessible: {len(errors)}",
+        ]
         
         if args.verbose:
             if redirects:
-                print("\nRedirects:")
-                for url in redirects:
-                    print(f"  {url} -> {results[url]['final_url']}")
+                lines.append("\nRedirects:")
+                lines.extend(f"  {url} -> {results[url]['final_url']}" for url in redirects)
             
             if errors:
-                print("\nErrors/Not accessible:")
-                for url in errors:
-                    print(f"  {url} (Status code: {results[url]['status_code']})")
+                lines.append("\nErrors/Not accessible:")
+                lines.extend(f"  {url} (Status code: {results[url]['status_code']})" for url in errors)
+        
+        _print_lines(lines)
         
         # Save results if output specified
         if args.output:
@@ -429,22 +627,12 @@ def validate_command(args):
                 "results": results
             }
             
-            with open(args.output, 'w') as f:
-                json.dump(output, f, indent=2)
+            _write_json(args.output, output)
             
-            logger.info(f"Validation results saved to {args.output}")
+            validate_logger.info(f"Validation results saved to {args.output}")
 
-def main():
-    """
-    Main entry point for CLI.
-    """
-    parser = argparse.ArgumentParser(description="Web Crawler Command Line Interface")
-    parser.add_argument("--log-level", choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
-                        default="INFO", help="Set logging level")
-    
-    subparsers = parser.add_subparsers(dest="command", help="Command to execute")
-    
-    # Crawl command
+def _build_crawl_parser(subparsers):
+    """Add the crawl subcommand."""
     crawl_parser = subparsers.add_parser("crawl", help="Crawl a website")
     crawl_parser.add_argument("url", help="URL to start crawling from")
     crawl_parser.add_argument("--depth", type=int, default=3, help="Maximum crawl depth")
@@ -455,52 +643,53 @@ def main():
     crawl_parser.add_argument("--output-format", choices=["sqlite", "mongodb", "csv", "json"],
                              help="Output format for crawled data")
     crawl_parser.add_argument("--report", help="Generate a report (provide filename or 'true')")
-    crawl_parser.set_defaults(func=crawl_command)
-    
-    # Analyze command
+
+def _build_analyze_parser(subparsers):
+    """Add the analyze subcommand."""
     analyze_parser = subparsers.add_parser("analyze", help="Analyze crawled data")
     analyze_parser.add_argument("domain", help="Domain to analyze")
     analyze_parser.add_argument("--output", help="Output file for analysis report")
-    analyze_parser.set_defaults(func=analyze_command)
-    
-    # Server command
+
+def _build_server_parser(subparsers):
+    """Add the server subcommand."""
     server_parser = subparsers.add_parser("server", help="Start web server")
     server_parser.add_argument("--host", help="Server host")
     server_parser.add_argument("--port", type=int, help="Server port")
     server_parser.add_argument("--debug", action="store_true", help="Enable debug mode")
-    server_parser.set_defaults(func=server_command)
-    
-    # Export command
+
+def _build_export_parser(subparsers):
+    """Add the export subcommand."""
     export_parser = subparsers.add_parser("export", help="Export crawled data")
-    export_parser.add_argument("output", help="Output file (.csv, .json, .xlsx)")
+    export_parser.add_argument("output", help=f"Output file ({', '.join(EXPORT_WRITERS)})")
     export_parser.add_argument("--filter", help="Filter by URL (contains)")
     export_parser.add_argument("--limit", type=int, default=1000, help="Maximum number of records to export")
-    export_parser.set_defaults(func=export_command)
-    
-    # Screenshot command
+
+def _build_screenshot_parser(subparsers):
+    """Add the screenshot subcommand."""
     screenshot_parser = subparsers.add_parser("screenshot", help="Take a screenshot of a webpage")
     screenshot_parser.add_argument("url", help="URL to screenshot")
     screenshot_parser.add_argument("--output", help="Output file path")
-    screenshot_parser.set_defaults(func=screenshot_command)
-    
-    # Download command
+
+def _build_download_parser(subparsers):
+    """Add the download subcommand."""
     download_parser = subparsers.add_parser("download", help="Download files from URLs")
     download_group = download_parser.add_mutually_exclusive_group(required=True)
     download_group.add_argument("--url", help="URL to download")
     download_group.add_argument("--url-file", help="File containing URLs to download (one per line)")
     download_parser.add_argument("--output-dir", help="Output directory for downloaded files")
-    download_parser.set_defaults(func=download_command)
-    
-    # Config command
+    download_parser.add_argument("--workers", type=int, default=8, help="Number of parallel downloads")
+
+def _build_config_parser(subparsers):
+    """Add the config subcommand."""
     config_parser = subparsers.add_parser("config", help="Manage configuration")
     config_group = config_parser.add_mutually_exclusive_group(required=True)
     config_group.add_argument("--get", help="Get a configuration value")
     config_group.add_argument("--set", help="Set a configuration value")
     config_group.add_argument("--show", action="store_true", help="Show all configuration")
     config_parser.add_argument("--value", help="Value to set (required with --set)")
-    config_parser.set_defaults(func=config_command)
-    
-    # Validate command
+
+def _build_validate_parser(subparsers):
+    """Add the validate subcommand."""
     validate_parser = subparsers.add_parser("validate", help="Validate URLs")
     validate_group = validate_parser.add_mutually_exclusive_group(required=True)
     validate_group.add_argument("--url", help="URL to validate")
@@ -509,17 +698,62 @@ def main():
     validate_parser.add_argument("--workers", type=int, default=10, help="Number of parallel workers")
     validate_parser.add_argument("--timeout", type=int, default=5, help="Request timeout in seconds")
     validate_parser.add_argument("--verbose", "-v", action="store_true", help="Show detailed results")
-    validate_parser.set_defaults(func=validate_command)
+
+# Subcommand name -> function that runs it
+COMMANDS = {
+    "crawl": crawl_command,
+    "analyze": analyze_command,
+    "server": server_command,
+    "export": export_command,
+    "screenshot": screenshot_command,
+    "download": download_command,
+    "config": config_command,
+    "validate": validate_command,
+}
+
+# Subcommand name -> function that adds its parser, in help order
+SUBCOMMANDS = {
+    "crawl": _build_crawl_parser,
+    "analyze": _build_analyze_parser,
+    "server": _build_server_parser,
+    "export": _build_export_parser,
+    "screenshot": _build_screenshot_parser,
+    "download": _build_download_parser,
+    "config": _build_config_parser,
+    "validate": _build_validate_parser,
+}
+
+def main(argv=None):
+    """
+    Main entry point for CLI.
+    
+    Args:
+        argv: Command line arguments (defaults to sys.argv[1:])
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+    
+    parser = argparse.ArgumentParser(description="Web Crawler Command Line Interface")
+    parser.add_argument("--log-level", choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+                        default="INFO", help="Set logging level")
+    
+    subparsers = parser.add_subparsers(dest="command", help="Command to execute")
+    
+    # Only build the requested subcommand; help and unknown commands get all of them
+    command = next((arg for arg in argv if arg in SUBCOMMANDS), None)
+    builders = [SUBCOMMANDS[command]] if command else SUBCOMMANDS.values()
+    for build_parser in builders:
+        build_parser(subparsers)
     
     # Parse arguments
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     if not args.command:
         parser.print_help()
         sys.exit(1)
     
     # Execute command
-    args.func(args)
+    COMMANDS[args.command](args)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,7 +1,9 @@
 # config.py
 import os
+import copy
 import json
 import logging
+from contextlib import contextmanager
 from pathlib import Path
 
 # Base directory of the project
@@ -18,6 +20,7 @@ DEFAULT_CONFIG = {
     # Server settings
     "host": "0.0.0.0",
     "port": 5000,
+    "server_threads": 8,
     
     # Crawler settings
     "default_max_depth": 3,
@@ -61,6 +64,30 @@ DEFAULT_CONFIG = {
     "date_format": "%Y-%m-%d %H:%M:%S"
 }
 
+# (config key, crawler config name) pairs returned by get_crawler_config()
+_CRAWLER_KEYS = (
+    ("default_max_depth", "max_depth"),
+    ("concurrent_requests", "concurrent_requests"),
+    ("request_timeout", "timeout"),
+    ("respect_robots_txt", "respect_robots_txt"),
+    ("user_agent", "user_agent"),
+    ("follow_redirects", "follow_redirects"),
+    ("retry_failed_requests", "retry_failed_requests"),
+    ("max_retries", "max_retries"),
+    ("retry_delay", "retry_delay"),
+    ("selenium_enabled", "selenium_enabled"),
+    ("headless", "headless"),
+    ("selenium_timeout", "selenium_timeout"),
+    ("wait_for_js", "wait_for_js"),
+)
+
+# db_type -> (config key, connection param name) pairs; other types are file-based
+_DATABASE_KEYS = {
+    "sqlite": (("sqlite_path", "db_path"),),
+    "mongodb": (("mongodb_connection", "connection_string"), ("mongodb_db_name", "db_name")),
+}
+_FILE_DATABASE_KEYS = (("data_dir", "data_dir"),)
+
 class Config:
     """Configuration manager for the crawler application."""
     
@@ -74,12 +101,24 @@ class Config:
         self.config_file = os.path.join(BASE_DIR, config_file)
         self.config = DEFAULT_CONFIG.copy()
         
+        # Inside batch() changes are only marked dirty and saved on exit
+        self._batch_depth = 0
+        self._dirty = False
+        
+        # Last state known to be on disk; saves that would not change it are skipped
+        self._saved_config = None
+        
+        # Derived configs, rebuilt after the next set()
+        self._database_config = None
+        self._crawler_config = None
+        
         # Load configuration from file if it exists
         if os.path.exists(self.config_file):
             try:
                 with open(self.config_file, 'r') as f:
                     loaded_config = json.load(f)
                     self.config.update(loaded_config)
+                    self._saved_config = copy.deepcopy(self.config)
                     logging.info(f"Loaded configuration from {self.config_file}")
             except (json.JSONDecodeError, IOError) as e:
                 logging.error(f"Error loading config from {self.config_file}: {str(e)}")
@@ -102,30 +141,81 @@ class Config:
         """
         return self.config.get(key, default)
     
-    def set(self, key, value):
+    def set(self, key, value, *, persist=True):
         """
         Set a configuration value.
         
         Args:
             key: Configuration key
             value: Value to set
+            persist: Whether to write the configuration file now
             
         Returns:
             bool: Success status
         """
         self.config[key] = value
+        self._dirty = True
+        self._database_config = None
+        self._crawler_config = None
+        if not persist or self._batch_depth:
+            return True
+        return self.save_config()
+    
+    def set_many(self, values):
+        """
+        Set several configuration values and save them with a single write.
+        
+        Args:
+            values: Dict of {key: value}
+            
+        Returns:
+            bool: Success status
+        """
+        for key, value in values.items():
+            self.set(key, value, persist=False)
+        if self._batch_depth:
+            return True
         return self.save_config()
     
+    @contextmanager
+    def batch(self):
+        """
+        Group several set() calls into one save when the block exits.
+        
+        Example:
+            with config.batch():
+                config.set("host", "127.0.0.1")
+                config.set("port", 8080)
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth and self._dirty:
+                self.save_config()
+    
     def save_config(self):
         """
         Save configuration to file.
         
+        The file is written to a temporary path and moved into place, so a
+        crash mid-write never leaves a truncated config behind.
+        
         Returns:
             bool: Success status
         """
+        if self.config == self._saved_config:
+            self._dirty = False
+            return True
+        
+        tmp_file = f"{self.config_file}.tmp"
         try:
-            with open(self.config_file, 'w') as f:
+            with open(tmp_file, 'w') as f:
                 json.dump(self.config, f, indent=2)
+            os.replace(tmp_file, self.config_file)
+            self._saved_config = copy.deepcopy(self.config)
+            self._dirty = False
             logging.info(f"Configuration saved to {self.config_file}")
             return True
         except IOError as e:
@@ -136,50 +226,35 @@ class Config:
         """
         Get database configuration.
         
+        The result is cached until the next set(); treat it as read-only.
+        
         Returns:
             tuple: (db_type, connection_params)
         """
-        db_type = self.get("db_type", "sqlite")
-        
-        if db_type == "sqlite":
-            connection_params = {
-                "db_path": self.get("sqlite_path", "crawler_data.db")
-            }
-        elif db_type == "mongodb":
-            connection_params = {
-                "connection_string": self.get("mongodb_connection", "mongodb://localhost:27017/"),
-                "db_name": self.get("mongodb_db_name", "crawler_data")
-            }
-        else:
-            # File-based storage
-            connection_params = {
-                "data_dir": self.get("data_dir", "crawler_data")
-            }
+        if self._database_config is not None:
+            return self._database_config
         
-        return db_type, connection_params
+        db_type = self.get("db_type", DEFAULT_CONFIG["db_type"])
+        keys = _DATABASE_KEYS.get(db_type, _FILE_DATABASE_KEYS)
+        connection_params = {name: self.config.get(key, DEFAULT_CONFIG[key]) for key, name in keys}
+        
+        self._database_config = (db_type, connection_params)
+        return self._database_config
     
     def get_crawler_config(self):
         """
         Get crawler configuration.
         
+        The result is cached until the next set(); treat it as read-only.
+        
         Returns:
             dict: Crawler configuration
         """
-        return {
-            "max_depth": self.get("default_max_depth", 3),
-            "concurrent_requests": self.get("concurrent_requests", 5),
-            "timeout": self.get("request_timeout", 10),
-            "respect_robots_txt": self.get("respect_robots_txt", True),
-            "user_agent": self.get("user_agent", "WebCrawler/1.0"),
-            "follow_redirects": self.get("follow_redirects", True),
-            "retry_failed_requests": self.get("retry_failed_requests", True),
-            "max_retries": self.get("max_retries", 3),
-            "retry_delay": self.get("retry_delay", 2),
-            "selenium_enabled": self.get("selenium_enabled", True),
-            "headless": self.get("headless", True),
-            "selenium_timeout": self.get("selenium_timeout", 10),
-            "wait_for_js": self.get("wait_for_js", 2)
-        }
+        if self._crawler_config is not None:
+            return self._crawler_config
+        
+        self._crawler_config = {name: self.config.get(key, DEFAULT_CONFIG[key]) for key, name in _CRAWLER_KEYS}
+        return self._crawler_config
     
     def to_dict(self):
         """
@@ -1,20 +1,62 @@
 # crawler_utils.py
 import re
+import atexit
 import logging
-import hashlib
 import os
+import queue
+import tempfile
+import threading
+from collections import Counter
+from functools import lru_cache
+from itertools import islice
 from urllib.parse import urlparse, urljoin
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.robotparser import RobotFileParser
+import ada_url
 import requests
+import xxhash
+from requests.adapters import HTTPAdapter
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Shared session so repeat requests to a host reuse kept-alive connections
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(pool_connections=100, pool_maxsize=100, max_retries=0)
+_SESSION.mount('http://', _ADAPTER)
+_SESSION.mount('https://', _ADAPTER)
+
+# Patterns used by url_to_filename
+_SCHEME_RE = re.compile(r'^https?://')
+_NONALNUM_RE = re.compile(r'[^a-zA-Z0-9]')
+
+# Patterns used by detect_content_type
+_PRICE_RE = re.compile(r'[$€£]\d+(?:\.\d{2})?|\d+(?:\.\d{2})?\s*(?:USD|EUR|GBP)')
+_ARTICLE_CLASS_RE = re.compile(r'article|post|blog')
+_LIST_CLASS_RE = re.compile(r'list|grid')
+# URLs the WHATWG parser would serialize unchanged: lowercase host whose last
+# label is not numeric (so no IPv4 rewriting), a port without leading zeros,
+# a path, and only characters that are never percent-encoded. Dot segments,
+# punycode labels and default or out-of-range ports are ruled out separately
+# in _is_canonical_url.
+_CANONICAL_URL_RE = re.compile(
+    r"https?://(?:[a-z0-9-]+\.)*[a-z][a-z0-9-]*\.?(?::[1-9]\d{0,4})?/[A-Za-z0-9\-._~!$&()*+,;=:@/%?]*"
+)
+_DOT_SEGMENT_RE = re.compile(r'/\.\.?(?:/|\?|$)|%2e', re.IGNORECASE)
+
+@lru_cache(maxsize=8192)
+def _cached_urlparse(url):
+    """urlparse() memoized; crawls parse the same URLs over and over."""
+    return urlparse(url)
+
+@lru_cache(maxsize=4096)
 def normalize_url(url):
     """
     Normalize a URL by removing fragments, defaulting to https if scheme is missing,
     and ensuring trailing slash for domain-only URLs.
     
+    Parsing follows the WHATWG URL standard (via Ada), which also lowercases
+    the host, drops default ports and resolves dot segments in the path.
+    
     Args:
         url: The URL to normalize
         
@@ -25,8 +67,41 @@ def normalize_url(url):
     if not url.startswith(('http://', 'https://')):
         url = 'https://' + url
     
-    # Parse the URL
-    parsed = urlparse(url)
+    # Most links are already canonical; skip the parse and rebuild for those
+    if _is_canonical_url(url):
+        return url
+    
+    try:
+        parsed = ada_url.URL(url)
+    except ValueError:
+        return _normalize_url_fallback(url)
+    
+    # Special schemes always have at least "/" as path; only the fragment goes
+    # (the first "#" in a serialized URL always starts the fragment)
+    return parsed.href.partition('#')[0]
+
+def _is_canonical_url(url):
+    """Check whether url is already in the form normalize_url would return."""
+    if not _CANONICAL_URL_RE.fullmatch(url):
+        return False
+    path_and_query = url[url.index('/', 8):]
+    path = path_and_query.partition('?')[0]
+    if _DOT_SEGMENT_RE.search(path):
+        return False
+    authority = url[url.index('//') + 2:len(url) - len(path_and_query)]
+    # Punycode labels are validated (and may be rejected) by the parser
+    if 'xn--' in authority:
+        return False
+    port = authority.partition(':')[2]
+    if not port:
+        return True
+    # Default ports are dropped by the parser
+    default_port = 443 if url.startswith('https') else 80
+    return int(port) != default_port and int(port) <= 65535
+
+def _normalize_url_fallback(url):
+    """Normalize a URL that the WHATWG parser rejects, using urllib."""
+    parsed = _cached_urlparse(url)
     
     # Build normalized URL
     normalized = f"{parsed.scheme}://{parsed.netloc}"
@@ -43,6 +118,7 @@ def normalize_url(url):
     
     return normalized
 
+@lru_cache(maxsize=4096)
 def get_domain(url):
     """
     Extract domain from a URL.
@@ -51,10 +127,12 @@ def get_domain(url):
         url: The URL to extract domain from
         
     Returns:
-        str: Domain name
+        str: Domain name (host[:port], lowercased)
     """
-    parsed = urlparse(url)
-    return parsed.netloc
+    try:
+        return ada_url.URL(url).host
+    except ValueError:
+        return _cached_urlparse(url).netloc
 
 def is_valid_url(url):
     """
@@ -67,7 +145,7 @@ def is_valid_url(url):
         bool: True if valid, False otherwise
     """
     try:
-        result = urlparse(url)
+        result = _cached_urlparse(url)
         return all([result.scheme, result.netloc])
     except ValueError:
         return False
@@ -85,6 +163,7 @@ def is_same_domain(url1, url2):
     """
     return get_domain(url1) == get_domain(url2)
 
+@lru_cache(maxsize=4096)
 def url_to_filename(url):
     """
     Convert a URL to a safe filename.
@@ -96,13 +175,13 @@ def url_to_filename(url):
         str: Safe filename
     """
     # Remove scheme and special characters
-    filename = re.sub(r'^https?://', '', url)
-    filename = re.sub(r'[^a-zA-Z0-9]', '_', filename)
+    filename = _SCHEME_RE.sub('', url)
+    filename = _NONALNUM_RE.sub('_', filename)
     
     # Limit length
     if len(filename) > 100:
-        # Use hash for long URLs
-        url_hash = hashlib.md5(url.encode()).hexdigest()
+        # Use a (non-cryptographic) hash for long URLs
+        url_hash = xxhash.xxh3_128_hexdigest(url.encode())
         filename = f"{filename[:50]}_{url_hash}"
     
     return filename
@@ -122,7 +201,7 @@ def fetch_robots_txt(domain):
     disallowed = []
     
     try:
-        response = requests.get(robots_url, timeout=5)
+        response = _SESSION.get(robots_url, timeout=5)
         if response.status_code == 200:
             lines = response.text.split('\n')
             
@@ -154,29 +233,95 @@ def fetch_robots_txt(domain):
         'disallowed': disallowed
     }
 
-def is_allowed_by_robots(url, robots_rules):
+# User agent matched against robots.txt groups
+ROBOTS_USER_AGENT = 'web-crawler'
+
+@lru_cache(maxsize=1024)
+def _robots_for(domain):
+    """
+    Fetch and parse robots.txt for a domain once per process.
+    
+    Args:
+        domain: Domain (host[:port]) to fetch robots.txt for
+        
+    Returns:
+        RobotFileParser: Parsed rules
+    """
+    parser = RobotFileParser(f"https://{domain}/robots.txt")
+    try:
+        response = _SESSION.get(parser.url, timeout=5)
+    except requests.RequestException as e:
+        logger.warning(f"Could not fetch robots.txt for {domain}: {str(e)}")
+        parser.allow_all = True
+        return parser
+    
+    # Same status handling as RobotFileParser.read()
+    if response.status_code in (401, 403):
+        parser.disallow_all = True
+    elif response.status_code >= 400:
+        parser.allow_all = True
+    else:
+        parser.parse(response.text.splitlines())
+    return parser
+
+def can_fetch(url, user_agent=ROBOTS_USER_AGENT):
+    """
+    Check robots.txt for a URL, fetching each domain's rules only once.
+    
+    Args:
+        url: URL to check
+        user_agent: User agent to match against robots.txt groups
+        
+    Returns:
+        bool: True if allowed, False otherwise
+    """
+    return _robots_for(get_domain(url)).can_fetch(user_agent, url)
+
+@lru_cache(maxsize=256)
+def _prefix_regex(prefixes):
+    """
+    Compile robots.txt paths into one anchored alternation.
+    
+    A single match() then tests every prefix at once instead of a
+    startswith() call per rule.
+    
+    Args:
+        prefixes: Tuple of path prefixes
+        
+    Returns:
+        re.Pattern or None if there are no prefixes
+    """
+    if not prefixes:
+        return None
+    return re.compile('|'.join(map(re.escape, prefixes)))
+
+def is_allowed_by_robots(url, robots_rules=None):
     """
     Check if a URL is allowed according to robots.txt rules.
     
     Args:
         url: URL to check
-        robots_rules: Dictionary with allowed and disallowed paths
+        robots_rules: Dictionary with allowed and disallowed paths from
+            fetch_robots_txt(); when omitted the cached can_fetch() is used
         
     Returns:
         bool: True if allowed, False otherwise
     """
-    parsed = urlparse(url)
+    if robots_rules is None:
+        return can_fetch(url)
+    
+    parsed = _cached_urlparse(url)
     path = parsed.path
     
     # Check if specifically allowed
-    for allow_path in robots_rules.get('allowed', []):
-        if path.startswith(allow_path):
-            return True
+    allow_re = _prefix_regex(tuple(robots_rules.get('allowed', ())))
+    if allow_re and allow_re.match(path):
+        return True
     
     # Check if specifically disallowed
-    for disallow_path in robots_rules.get('disallowed', []):
-        if path.startswith(disallow_path):
-            return False
+    disallow_re = _prefix_regex(tuple(robots_rules.get('disallowed', ())))
+    if disallow_re and disallow_re.match(path):
+        return False
     
     # Default to allowed
     return True
@@ -185,6 +330,10 @@ def download_file(url, output_dir='downloads'):
     """
     Download a file from a URL.
     
+    The body is written to a private temporary file in output_dir and then
+    renamed onto the target name, so a re-download replaces the old file and
+    parallel downloads of the same name never interleave (the last one wins).
+    
     Args:
         url: URL to download
         output_dir: Directory to save to
@@ -192,6 +341,7 @@ def download_file(url, output_dir='downloads'):
     Returns:
         str: Path to downloaded file or None if failed
     """
+    temp_path = None
     try:
         # Create output directory if it doesn't exist
         os.makedirs(output_dir, exist_ok=True)
@@ -200,54 +350,72 @@ def download_file(url, output_dir='downloads'):
         filename = url.split('/')[-1]
         if not filename:
             filename = f"download_{datetime.now().strftime('%Y%m%d%H%M%S')}"
-        
-        # Ensure filename is unique
         file_path = os.path.join(output_dir, filename)
-        if os.path.exists(file_path):
-            base, ext = os.path.splitext(filename)
-            filename = f"{base}_{datetime.now().strftime('%Y%m%d%H%M%S')}{ext}"
-            file_path = os.path.join(output_dir, filename)
         
-        # Download file
-        response = requests.get(url, stream=True, timeout=30)
-        response.raise_for_status()
-        
-        with open(file_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
+        # Download file; the with block releases the connection on any error
+        with _SESSION.get(url, stream=True, timeout=30) as response:
+            response.raise_for_status()
+            
+            fd, temp_path = tempfile.mkstemp(prefix=f".{filename}.", suffix=".part", dir=output_dir)
+            # mkstemp creates the file owner-only; use the usual file mode
+            os.chmod(temp_path, 0o644)
+            # Large chunks keep per-chunk overhead low; iter_content also turns
+            # mid-body urllib3 errors into RequestExceptions
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=1 << 20):
+                    f.write(chunk)
         
+        os.replace(temp_path, file_path)
+        temp_path = None
         logger.info(f"Downloaded {url} to {file_path}")
         return file_path
         
     except (requests.RequestException, IOError) as e:
         logger.error(f"Error downloading {url}: {str(e)}")
         return None
+    finally:
+        if temp_path is not None:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
 
 def check_urls_parallel(urls, max_workers=10, timeout=5):
     """
     Check multiple URLs in parallel.
     
+    Requests are issued as HEADs from a single asyncio event loop, so one
+    thread can keep max_workers connections in flight.
+    
     Args:
         urls: List of URLs to check
-        max_workers: Maximum number of parallel workers
+        max_workers: Maximum number of concurrent requests
         timeout: Request timeout in seconds
         
     Returns:
         dict: Dictionary with URL status
     """
-    results = {}
+    import asyncio
+    return asyncio.run(_check_urls_async(urls, max_workers, timeout))
+
+async def _check_urls_async(urls, max_workers, timeout):
+    """Run the HEAD checks for check_urls_parallel on one shared session."""
+    import asyncio
+    import aiohttp
     
-    def check_url(url):
+    async def check_url(session, url):
         try:
-            response = requests.head(url, timeout=timeout, allow_redirects=True)
-            return url, response.status_code, response.url
-        except requests.RequestException:
+            async with session.head(url, allow_redirects=True) as response:
+                return url, response.status, str(response.url)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
             return url, 0, None
     
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_url = {executor.submit(check_url, url): url for url in urls}
-        for future in as_completed(future_to_url):
-            url, status_code, final_url = future.result()
+    results = {}
+    connector = aiohttp.TCPConnector(limit=max_workers)
+    # Per-socket timeouts, so time spent waiting for a free connection doesn't count
+    client_timeout = aiohttp.ClientTimeout(total=None, sock_connect=timeout, sock_read=timeout)
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout) as session:
+        for url, status_code, final_url in await asyncio.gather(*(check_url(session, url) for url in urls)):
             results[url] = {
                 'status_code': status_code,
                 'accessible': 200 <= status_code < 400,
@@ -257,120 +425,192 @@ def check_urls_parallel(urls, max_workers=10, timeout=5):
     
     return results
 
-def extract_metadata(html_content):
+def parse_page(html_content):
     """
-    Extract metadata from HTML content.
+    Parse HTML once so it can be shared by extract_metadata and detect_content_type.
     
     Args:
         html_content: HTML content as string
         
     Returns:
-        dict: Extracted metadata
+        BeautifulSoup: Parsed document (lxml parser)
     """
     from bs4 import BeautifulSoup
+    return BeautifulSoup(html_content, 'lxml')
+
+def extract_metadata(html_content, soup=None):
+    """
+    Extract metadata from HTML content.
     
+    Args:
+        html_content: HTML content as string
+        soup: Optional document already parsed with parse_page()
+        
+    Returns:
+        dict: Extracted metadata
+    """
     metadata = {}
-    soup = BeautifulSoup(html_content, 'html.parser')
+    if soup is None:
+        soup = parse_page(html_content)
     
     # Extract title
     title_tag = soup.find('title')
     if title_tag:
         metadata['title'] = title_tag.get_text(strip=True)
     
-    # Extract meta tags
-    for meta in soup.find_all('meta'):
-        name = meta.get('name', meta.get('property', '')).lower()
-        content = meta.get('content')
-        
-        if name and content:
-            metadata[name] = content
+    # Extract meta tags; the selector skips metas without a name or content
+    metas = soup.select('meta[name][content], meta[property][content]')
+    metadata.update({
+        name: meta['content']
+        for meta in metas
+        if (name := meta.get('name', meta.get('property', '')).lower()) and meta['content']
+    })
     
     # Extract canonical URL
-    canonical = soup.find('link', {'rel': 'canonical'})
+    canonical = soup.select_one('link[rel~=canonical][href]')
     if canonical and canonical.get('href'):
         metadata['canonical_url'] = canonical['href']
     
     return metadata
 
-def detect_content_type(html_content):
+def detect_content_type(html_content, soup=None):
     """
     Detect the type of content in an HTML page.
     
     Args:
         html_content: HTML content as string
+        soup: Optional document already parsed with parse_page()
         
     Returns:
         str: Content type (article, product, listing, etc.)
     """
-    from bs4 import BeautifulSoup
-    import re
-    
-    soup = BeautifulSoup(html_content, 'html.parser')
-    
-    # Check for e-commerce indicators
-    price_patterns = [
-        r'\$\d+(\.\d{2})?',
-        r'€\d+(\.\d{2})?',
-        r'£\d+(\.\d{2})?',
-        r'\d+(\.\d{2})?\s*(USD|EUR|GBP)'
-    ]
-    
-    for pattern in price_patterns:
-        if re.search(pattern, html_content):
-            # Check for multiple products
-            product_elements = 0
-            for tag in soup.find_all(['div', 'li']):
-                for pat in price_patterns:
-                    if re.search(pat, tag.get_text()):
-                        product_elements += 1
-                        if product_elements > 1:
-                            return "product_listing"
-            
-            return "product_page"
+    # Check for e-commerce indicators: more than one price means several products
+    prices = sum(1 for _ in islice(_PRICE_RE.finditer(html_content), 2))
+    if prices > 1:
+        return "product_listing"
+    if prices == 1:
+        return "product_page"
+    
+    if soup is None:
+        soup = parse_page(html_content)
     
     # Check for blog/article indicators
-    if soup.find('article') or soup.find(class_=re.compile(r'article|post|blog')):
+    if soup.find('article') or soup.find(class_=_ARTICLE_CLASS_RE):
         return "article"
     
     # Check for listing pages
-    if soup.find_all('li', limit=15) or soup.find_all(class_=re.compile(r'list|grid')):
+    if soup.find_all('li', limit=15) or soup.find_all(class_=_LIST_CLASS_RE):
         return "listing"
     
     # Default to generic
     return "generic"
 
-def take_screenshot(url, output_path=None):
+# Headless Chrome drivers reused by take_screenshot, created on demand
+_SCREENSHOT_POOL_SIZE = 4
+_DRIVER_POOL = queue.Queue()
+_driver_count = 0
+_driver_count_lock = threading.Lock()
+
+@lru_cache(maxsize=1)
+def _chromedriver_path():
+    """Install (or locate) chromedriver once per process."""
+    from webdriver_manager.chrome import ChromeDriverManager
+    return ChromeDriverManager().install()
+
+def _new_screenshot_driver():
+    """Start a headless Chrome for the screenshot pool."""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+    
+    # Setup Chrome options
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--window-size=1920,1080")
+    
+    service = Service(_chromedriver_path())
+    return webdriver.Chrome(service=service, options=chrome_options)
+
+def _acquire_driver():
+    """Take an idle pooled driver, starting a new one while the pool is below its size."""
+    global _driver_count
+    try:
+        return _DRIVER_POOL.get_nowait()
+    except queue.Empty:
+        pass
+    
+    with _driver_count_lock:
+        start_new = _driver_count < _SCREENSHOT_POOL_SIZE
+        if start_new:
+            _driver_count += 1
+    if not start_new:
+        return _DRIVER_POOL.get()
+    
+    try:
+        return _new_screenshot_driver()
+    except Exception:
+        with _driver_count_lock:
+            _driver_count -= 1
+        raise
+
+def _discard_driver(driver):
+    """Quit a driver that failed so the pool can replace it."""
+    global _driver_count
+    with _driver_count_lock:
+        _driver_count -= 1
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+@atexit.register
+def close_screenshot_drivers():
+    """Quit every idle pooled driver."""
+    global _driver_count
+    while True:
+        try:
+            driver = _DRIVER_POOL.get_nowait()
+        except queue.Empty:
+            break
+        with _driver_count_lock:
+            _driver_count -= 1
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+def take_screenshot(url, output_path=None, timeout=10):
     """
     Take a screenshot of a webpage using Selenium.
     
+    Drivers come from a small pool and are reused between calls, so Chrome
+    is only started (and chromedriver installed) once rather than per shot.
+    
     Args:
         url: URL to screenshot
         output_path: Path to save screenshot to
+        timeout: Seconds to wait for the page to finish loading
         
     Returns:
         str: Path to screenshot or None if failed
     """
+    driver = None
     try:
-        from selenium import webdriver
-        from selenium.webdriver.chrome.options import Options
-        from selenium.webdriver.chrome.service import Service
-        from webdriver_manager.chrome import ChromeDriverManager
-        import time
-        
-        # Setup Chrome options
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--window-size=1920,1080")
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.common.exceptions import TimeoutException
         
-        # Initialize the driver
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=chrome_options)
+        driver = _acquire_driver()
         
-        # Navigate to the page
+        # Navigate to the page and wait for it to load
         driver.get(url)
-        time.sleep(2)  # Allow page to load
+        try:
+            WebDriverWait(driver, timeout).until(
+                lambda d: d.execute_script("return document.readyState") == "complete"
+            )
+        except TimeoutException:
+            logger.warning(f"Timed out waiting for {url} to load, taking screenshot anyway")
         
         # Determine output path if not provided
         if not output_path:
@@ -381,13 +621,16 @@ def take_screenshot(url, output_path=None):
         
         # Take screenshot
         driver.save_screenshot(output_path)
-        driver.quit()
+        _DRIVER_POOL.put(driver)
+        driver = None
         
         logger.info(f"Screenshot of {url} saved to {output_path}")
         return output_path
         
     except Exception as e:
         logger.error(f"Error taking screenshot of {url}: {str(e)}")
+        if driver is not None:
+            _discard_driver(driver)
         return None
 
 def generate_site_report(domain, data):
@@ -404,55 +647,23 @@ def generate_site_report(domain, data):
     if not data:
         return {"error": "No data available"}
     
-    # Initialize report
-    report = {
+    # Each statistic is a single pass handled by Counter or the builtins
+    content_types = Counter(item.get('content_type', 'unknown') for item in data)
+    status_codes = Counter(item['status_code'] for item in data if item.get('status_code'))
+    response_times = [item['response_time'] for item in data if item.get('response_time')]
+    
+    return {
         "domain": domain,
         "crawl_date": datetime.now().isoformat(),
         "pages_crawled": len(data),
-        "content_types": {},
+        "content_types": dict(content_types),
         "response_times": {
-            "average": 0,
-            "min": float('inf'),
-            "max": 0
+            # Averaged over every page crawled, as before
+            "average": sum(response_times) / len(data) if response_times else 0,
+            "min": min(response_times, default=0),
+            "max": max(response_times, default=0)
         },
-        "status_codes": {},
-        "errors": 0
+        "status_codes": dict(status_codes),
+        "errors": sum(count for status, count in status_codes.items()
+                      if status < 200 or status >= 400)
     }
-    
-    # Analyze data
-    total_response_time = 0
-    content_types = {}
-    status_codes = {}
-    
-    for item in data:
-        # Count content types
-        content_type = item.get('content_type', 'unknown')
-        content_types[content_type] = content_types.get(content_type, 0) + 1
-        
-        # Track response times
-        response_time = item.get('response_time')
-        if response_time:
-            total_response_time += response_time
-            report["response_times"]["min"] = min(report["response_times"]["min"], response_time)
-            report["response_times"]["max"] = max(report["response_times"]["max"], response_time)
-        
-        # Count status codes
-        status = item.get('status_code')
-        if status:
-            status_codes[status] = status_codes.get(status, 0) + 1
-            
-        # Count errors
-        if status and (status < 200 or status >= 400):
-            report["errors"] += 1
-    
-    # Calculate averages
-    if total_response_time > 0:
-        report["response_times"]["average"] = total_response_time / len(data)
-    if report["response_times"]["min"] == float('inf'):
-        report["response_times"]["min"] = 0
-    
-    # Add to report
-    report["content_types"] = content_types
-    report["status_codes"] = status_codes
-    
-    return report
\ No newline at end of file
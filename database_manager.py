@@ -1,14 +1,155 @@
+import csv
 import logging
-import json
 import os
-import sqlite3
+import re
+import threading
+from collections import OrderedDict
 from datetime import datetime
+from functools import lru_cache
+from itertools import islice
+from urllib.parse import urlsplit
+import orjson
+try:
+    # Newer, optimized SQLite build when pysqlite3-binary is installed
+    import pysqlite3 as sqlite3
+except ImportError:
+    import sqlite3
 import pandas as pd
-from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import ConnectionFailure, OperationFailure, ServerSelectionTimeoutError
 
 logger = logging.getLogger(__name__)
 
+# SQL run on hot paths. Keeping the text fixed lets each connection's
+# statement cache reuse the prepared statement instead of re-parsing it.
+# An upsert updates the existing row in place, where INSERT OR REPLACE would
+# delete it and insert a new one with a fresh id.
+_SQL_UPSERT_PAGE = (
+    "INSERT INTO crawled_pages (url, domain, crawl_date, crawl_day, data_json) "
+    "VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT(url) DO UPDATE SET domain = excluded.domain, crawl_date = excluded.crawl_date, "
+    "crawl_day = excluded.crawl_day, data_json = excluded.data_json"
+)
+_SQL_SELECT_DATA = "SELECT data_json FROM crawled_pages{where} LIMIT ?"
+# Projected reads pull single fields out with JSON1 instead of decoding whole rows.
+# json_type is NULL when the field is missing, so absent keys stay absent.
+_SQL_SELECT_FIELDS = "SELECT {columns} FROM crawled_pages{where} LIMIT ?"
+_SQL_FIELD_COLUMNS = "json_type(data_json, ?), json_extract(data_json, ?)"
+# Union of the top-level keys of the rows _SQL_SELECT_DATA would return, in first-seen order
+_SQL_SELECT_FIELD_NAMES = (
+    "SELECT field.key FROM "
+    "(SELECT ROW_NUMBER() OVER () AS n, data_json FROM crawled_pages{where} LIMIT ?) AS page, "
+    "json_each(page.data_json) AS field "
+    "GROUP BY field.key ORDER BY MIN(page.n), MIN(field.id)"
+)
+_SQL_DATA_VERSION = "SELECT COUNT(*), MAX(crawl_date) FROM crawled_pages"
+_SQL_TOTAL_PAGES = "SELECT COUNT(*) FROM crawled_pages{where}"
+_SQL_TOP_DOMAINS = """
+SELECT domain, COUNT(*) as count
+FROM crawled_pages{where}
+GROUP BY domain
+ORDER BY count DESC
+LIMIT 10
+"""
+_SQL_ACTIVITY_BY_DAY = """
+SELECT crawl_day, COUNT(*) as count
+FROM crawled_pages{where}
+GROUP BY crawl_day
+ORDER BY crawl_day
+"""
+
+# Buffered MongoDB upserts are sent in one bulk_write once this many pile up
+_MONGO_BATCH_SIZE = 500
+
+# Open CSV files kept for appending; the least recently used is closed first
+_MAX_CSV_HANDLES = 64
+
+def _url_domain(url):
+    """Domain (netloc) stored alongside each page for the stats queries."""
+    return urlsplit(url or '').netloc.lower()
+
+def _sqlite_url_filter(url=None, url_prefix=None, url_contains=None):
+    """
+    Build the WHERE clause for the URL filters accepted by the read methods.
+    
+    A prefix is matched as a range on the indexed url column, which SQLite
+    can serve from the index; a substring match always scans the table.
+    
+    Returns:
+        tuple: (where_sql, params)
+    """
+    clauses = []
+    params = []
+    if url:
+        clauses.append("url = ?")
+        params.append(url)
+    if url_prefix:
+        # Every string starting with the prefix sorts below this bound
+        clauses.append("url >= ? AND url < ?")
+        params.extend([url_prefix, url_prefix[:-1] + chr(ord(url_prefix[-1]) + 1)])
+    if url_contains:
+        escaped = url_contains.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        clauses.append("url LIKE ? ESCAPE '\\'")
+        params.append(f"%{escaped}%")
+    
+    where_sql = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    return where_sql, tuple(params)
+
+def _url_matches(value, url=None, url_prefix=None, url_contains=None):
+    """Apply the URL filters in Python for the file-based backends."""
+    value = value or ''
+    return ((not url or value == url)
+            and (not url_prefix or value.startswith(url_prefix))
+            and (not url_contains or url_contains in value))
+
+@lru_cache(maxsize=4096)
+def _data_file_name(url, suffix):
+    """File name the file backends use for a URL's records."""
+    url_parts = url.replace('://', '_').replace('/', '_')
+    return f"data_{url_parts}{suffix}"
+
+def _json_path(field):
+    """
+    JSON1 path for a top-level key, quoted so dots and brackets are not path syntax.
+    
+    SQLite compares the quoted label with the key as written in the stored
+    JSON, which orjson escapes the same way, but it does not unescape \" in
+    labels; callers must check _has_json_path first.
+    """
+    return '$.' + orjson.dumps(field).decode()
+
+def _has_json_path(field):
+    """Whether _json_path can address this key; a '"' ends the quoted label early."""
+    return '"' not in field
+
+def _project(item, fields):
+    """Keep only the requested fields that are present in item."""
+    return {field: item[field] for field in fields if field in item}
+
+def _columns(rows, *names):
+    """Turn (a, b) result rows into {name_a: [...], name_b: [...]} column lists."""
+    columns = list(zip(*rows)) or [()] * len(names)
+    return {name: list(column) for name, column in zip(names, columns)}
+
+def _read_json_records(path):
+    """
+    Yield the records stored in a JSON backend file.
+    
+    .jsonl files hold one record per line; legacy .json files hold a single
+    record or a list of records.
+    """
+    with open(path, 'rb') as f:
+        if path.endswith('.jsonl'):
+            for line in f:
+                if line.strip():
+                    yield orjson.loads(line)
+            return
+        file_data = orjson.loads(f.read())
+    if isinstance(file_data, list):
+        yield from file_data
+    else:
+        yield file_data
+
 class DatabaseManager:
     """
     Database manager to handle storing and retrieving crawled data.
@@ -26,14 +167,23 @@ class DatabaseManager:
         self.db_type = db_type.lower()
         self.connection_params = connection_params or {}
         self.connection = None
+        # One SQLite connection per thread, opened lazily and kept warm
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        # CSV backend: filename -> (file, DictWriter), in least recently used order
+        self._csv_writers = OrderedDict()
+        self._csv_lock = threading.Lock()
+        # MongoDB backend: pending UpdateOne operations
+        self._mongo_buffer = []
+        self._mongo_lock = threading.Lock()
         self.initialized = self._initialize_connection()
     
     def _initialize_connection(self):
         """Initialize database connection based on db_type."""
         try:
             if self.db_type == "sqlite":
-                db_path = self.connection_params.get("db_path", "crawler_data.db")
-                self.connection = sqlite3.connect(db_path)
+                self.connection = self._get_connection()
                 self._setup_sqlite_tables()
                 return True
             
@@ -44,6 +194,11 @@ class DatabaseManager:
                 # Check if connection is successful
                 self.connection.server_info()
                 self.db = self.connection[db_name]
+                try:
+                    self.db["crawled_pages"].create_index("url", unique=True)
+                except OperationFailure as e:
+                    # Existing duplicate URLs prevent the unique index; upserts still work
+                    logger.warning(f"Could not create unique url index: {str(e)}")
                 return True
                 
             elif self.db_type in ["csv", "json"]:
@@ -60,6 +215,22 @@ class DatabaseManager:
             logger.error(f"Failed to initialize database connection: {str(e)}")
             return False
     
+    def _get_connection(self):
+        """Get the calling thread's SQLite connection, opening it on first use."""
+        conn = getattr(self._local, 'connection', None)
+        if conn is None:
+            db_path = self.connection_params.get("db_path", "crawler_data.db")
+            conn = sqlite3.connect(db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # WAL keeps the database consistent without an fsync per commit
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA cache_size=-64000")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            self._local.connection = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+    
     def _setup_sqlite_tables(self):
         """Set up SQLite tables if they don't exist."""
         cursor = self.connection.cursor()
@@ -69,11 +240,29 @@ class DatabaseManager:
         CREATE TABLE IF NOT EXISTS crawled_pages (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             url TEXT UNIQUE,
+            domain TEXT,
             crawl_date TIMESTAMP,
+            crawl_day TEXT,
             data_json TEXT
         )
         ''')
         
+        # Migrate tables created before the precomputed columns existed
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(crawled_pages)")}
+        if 'domain' not in columns:
+            cursor.execute("ALTER TABLE crawled_pages ADD COLUMN domain TEXT")
+            rows = cursor.execute("SELECT id, url FROM crawled_pages").fetchall()
+            cursor.executemany(
+                "UPDATE crawled_pages SET domain = ? WHERE id = ?",
+                [(_url_domain(url), row_id) for row_id, url in rows]
+            )
+        if 'crawl_day' not in columns:
+            cursor.execute("ALTER TABLE crawled_pages ADD COLUMN crawl_day TEXT")
+            cursor.execute("UPDATE crawled_pages SET crawl_day = substr(crawl_date, 1, 10)")
+        
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_domain ON crawled_pages(domain)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_crawl_day ON crawled_pages(crawl_day)")
+        
         self.connection.commit()
     
     def save_data(self, data):
@@ -92,39 +281,38 @@ class DatabaseManager:
             
         try:
             if self.db_type == "sqlite":
-                cursor = self.connection.cursor()
+                conn = self._get_connection()
+                cursor = conn.cursor()
                 url = data.get('url')
                 # Convert data to JSON string for storage
-                data_json = json.dumps(data)
+                data_json = orjson.dumps(data).decode()
+                crawl_date = datetime.now().isoformat()
                 
                 cursor.execute(
-                    "INSERT OR REPLACE INTO crawled_pages (url, crawl_date, data_json) VALUES (?, ?, ?)",
-                    (url, datetime.now().isoformat(), data_json)
+                    _SQL_UPSERT_PAGE,
+                    (url, _url_domain(url), crawl_date, crawl_date[:10], data_json)
                 )
-                self.connection.commit()
+                conn.commit()
                 return True
                 
             elif self.db_type == "mongodb":
-                collection = self.db["crawled_pages"]
                 # Add timestamp
                 data['crawl_date'] = datetime.now()
-                # Use URL as unique identifier
-                result = collection.update_one(
-                    {"url": data['url']},
-                    {"$set": data},
-                    upsert=True
-                )
-                return result.acknowledged
+                # Use URL as unique identifier; the upsert is sent with the next batch
+                with self._mongo_lock:
+                    self._mongo_buffer.append(UpdateOne({"url": data['url']}, {"$set": data}, upsert=True))
+                    if len(self._mongo_buffer) < _MONGO_BATCH_SIZE:
+                        return True
+                return self._flush_mongo()
                 
             elif self.db_type == "csv":
-                # Create a DataFrame from data
-                df = pd.DataFrame([data])
                 # Use URL's domain and path as filename
-                url_parts = data.get('url', '').replace('://', '_').replace('/', '_')
-                filename = os.path.join(self.data_dir, f"data_{url_parts}.csv")
+                filename = os.path.join(self.data_dir, _data_file_name(data.get('url', ''), '.csv'))
                 
-                # Append or create CSV file
-                df.to_csv(filename, mode='a', header=not os.path.exists(filename), index=False)
+                # Append to the open file, creating it with a header on first write
+                with self._csv_lock:
+                    _, writer = self._get_csv_writer(filename, list(data.keys()))
+                    writer.writerow(data)
                 return True
                 
             elif self.db_type == "json":
@@ -132,26 +320,11 @@ class DatabaseManager:
                 data['crawl_date'] = datetime.now().isoformat()
                 
                 # Use URL's domain and path as filename
-                url_parts = data.get('url', '').replace('://', '_').replace('/', '_')
-                filename = os.path.join(self.data_dir, f"data_{url_parts}.json")
-                
-                # Read existing data if file exists
-                if os.path.exists(filename):
-                    with open(filename, 'r') as f:
-                        try:
-                            existing_data = json.load(f)
-                            if isinstance(existing_data, list):
-                                existing_data.append(data)
-                            else:
-                                existing_data = [existing_data, data]
-                        except json.JSONDecodeError:
-                            existing_data = [data]
-                else:
-                    existing_data = [data]
+                filename = os.path.join(self.data_dir, _data_file_name(data.get('url', ''), '.jsonl'))
                 
-                # Write data back to file
-                with open(filename, 'w') as f:
-                    json.dump(existing_data, f, indent=2)
+                # JSON Lines: append one record without re-reading the file
+                with open(filename, 'ab') as f:
+                    f.write(orjson.dumps(data) + b'\n')
                     
                 return True
                 
@@ -159,13 +332,129 @@ class DatabaseManager:
             logger.error(f"Error saving data: {str(e)}")
             return False
     
-    def get_data(self, url=None, limit=100):
+    def _get_csv_writer(self, filename, fieldnames):
+        """
+        Get the DictWriter appending to filename, opening the file if needed.
+        
+        The columns of an existing file are taken from its header line so
+        later rows line up with it. Callers must hold self._csv_lock.
+        
+        Args:
+            filename: Path of the CSV file
+            fieldnames: Columns to use when the file is new
+            
+        Returns:
+            tuple: (file, DictWriter)
+        """
+        entry = self._csv_writers.get(filename)
+        if entry is not None:
+            self._csv_writers.move_to_end(filename)
+            return entry
+        
+        header = None
+        if os.path.exists(filename):
+            with open(filename, newline='', encoding='utf-8') as f:
+                header = next(csv.reader(f), None)
+        
+        # UTF-8 regardless of locale, matching how pandas reads the files back
+        f = open(filename, 'a', newline='', encoding='utf-8')
+        writer = csv.DictWriter(f, fieldnames=header or fieldnames, extrasaction='ignore')
+        if not header:
+            writer.writeheader()
+        
+        self._csv_writers[filename] = (f, writer)
+        if len(self._csv_writers) > _MAX_CSV_HANDLES:
+            _, (oldest, _) = self._csv_writers.popitem(last=False)
+            oldest.close()
+        return f, writer
+    
+    def _flush_csv_writers(self, close=False):
+        """Flush buffered CSV rows to disk, optionally closing the files."""
+        with self._csv_lock:
+            for f, _ in self._csv_writers.values():
+                if close:
+                    f.close()
+                else:
+                    f.flush()
+            if close:
+                self._csv_writers.clear()
+    
+    def _flush_mongo(self):
+        """
+        Send the buffered MongoDB upserts in a single unordered bulk_write.
+        
+        Returns:
+            bool: Success status
+        """
+        with self._mongo_lock:
+            ops, self._mongo_buffer = self._mongo_buffer, []
+        if not ops:
+            return True
+        
+        try:
+            result = self.db["crawled_pages"].bulk_write(ops, ordered=False)
+            return result.acknowledged
+        except Exception as e:
+            logger.error(f"Error writing MongoDB batch: {str(e)}")
+            return False
+    
+    def save_many(self, items):
+        """
+        Save several items to the configured database in one go.
+        
+        For SQLite all rows are written with executemany inside a single
+        transaction and MongoDB upserts go out in one bulk_write; the file
+        backends fall back to save_data per item.
+        
+        Args:
+            items: List of data dictionaries to save
+        
+        Returns:
+            bool: Success status
+        """
+        if not self.initialized:
+            logger.error("Database connection not initialized")
+            return False
+        
+        if not items:
+            return True
+            
+        if self.db_type != "sqlite":
+            results = [self.save_data(data) for data in items]
+            if self.db_type == "mongodb":
+                results.append(self._flush_mongo())
+            elif self.db_type == "csv":
+                # Rows buffered within a batch reach disk once per batch
+                self._flush_csv_writers()
+            return all(results)
+            
+        try:
+            conn = self._get_connection()
+            crawl_date = datetime.now().isoformat()
+            rows = [
+                (data.get('url'), _url_domain(data.get('url')), crawl_date, crawl_date[:10], orjson.dumps(data).decode())
+                for data in items
+            ]
+            # The connection context manager commits once for the whole batch
+            with conn:
+                conn.executemany(_SQL_UPSERT_PAGE, rows)
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error saving data batch: {str(e)}")
+            return False
+    
+    def get_data(self, url=None, limit=100, url_prefix=None, url_contains=None, fields=None):
         """
         Retrieve data from the database.
         
         Args:
-            url: Optional URL to filter by
+            url: Optional URL to filter by (exact match)
             limit: Maximum number of records to return
+            url_prefix: Optional URL prefix to filter by (index-backed)
+            url_contains: Optional URL substring to filter by (full scan)
+            fields: Optional list of top-level keys to return; records then
+                only hold those keys (SQLite extracts them in SQL)
             
         Returns:
             list: Retrieved data
@@ -176,46 +465,60 @@ class DatabaseManager:
             
         try:
             if self.db_type == "sqlite":
-                cursor = self.connection.cursor()
+                cursor = self._get_connection().cursor()
                 
-                if url:
-                    cursor.execute(
-                        "SELECT data_json FROM crawled_pages WHERE url = ? LIMIT ?",
-                        (url, limit)
-                    )
-                else:
-                    cursor.execute(
-                        "SELECT data_json FROM crawled_pages LIMIT ?",
-                        (limit,)
-                    )
+                where_sql, params = _sqlite_url_filter(url, url_prefix, url_contains)
+                if fields and all(_has_json_path(field) for field in fields):
+                    return self._get_sqlite_fields(cursor, fields, where_sql, params, limit)
+                
+                cursor.execute(
+                    _SQL_SELECT_DATA.format(where=where_sql),
+                    params + (limit,)
+                )
                 
                 results = cursor.fetchall()
-                return [json.loads(row[0]) for row in results]
+                if fields:
+                    # Some key can't be expressed as a JSON1 path; decode the rows instead
+                    return [_project(orjson.loads(row[0]), fields) for row in results]
+                return [orjson.loads(row[0]) for row in results]
                 
             elif self.db_type == "mongodb":
+                # Make upserts still waiting in the buffer visible to the query
+                self._flush_mongo()
                 collection = self.db["crawled_pages"]
-                query = {"url": url} if url else {}
-                results = collection.find(query).limit(limit)
+                conditions = []
+                if url:
+                    conditions.append({"url": url})
+                if url_prefix:
+                    # Anchored regexes can use the url index
+                    conditions.append({"url": {"$regex": f"^{re.escape(url_prefix)}"}})
+                if url_contains:
+                    conditions.append({"url": {"$regex": re.escape(url_contains)}})
+                query = {"$and": conditions} if conditions else {}
+                projection = dict.fromkeys(fields, 1) | {"_id": 0} if fields else None
+                results = collection.find(query, projection).limit(limit)
                 return list(results)
                 
             elif self.db_type in ["csv", "json"]:
                 all_data = []
+                if self.db_type == "csv":
+                    # Make rows still buffered in open files visible to the reader
+                    self._flush_csv_writers()
                 
                 if url:
                     # Find specific file for URL
-                    url_parts = url.replace('://', '_').replace('/', '_')
-                    
                     if self.db_type == "csv":
-                        filename = os.path.join(self.data_dir, f"data_{url_parts}.csv")
+                        filename = os.path.join(self.data_dir, _data_file_name(url, '.csv'))
                         if os.path.exists(filename):
                             df = pd.read_csv(filename)
                             all_data = df.to_dict('records')
                             
                     else:  # json
-                        filename = os.path.join(self.data_dir, f"data_{url_parts}.json")
-                        if os.path.exists(filename):
-                            with open(filename, 'r') as f:
-                                all_data = json.load(f)
+                        # Records written before the switch to JSON Lines come first
+                        for suffix in ('.json', '.jsonl'):
+                            filename = os.path.join(self.data_dir, _data_file_name(url, suffix))
+                            if os.path.exists(filename):
+                                all_data.extend(_read_json_records(filename))
                                 
                 else:
                     # Get all files
@@ -226,25 +529,261 @@ class DatabaseManager:
                             df = pd.read_csv(file_path)
                             all_data.extend(df.to_dict('records'))
                             
-                        elif self.db_type == "json" and filename.endswith('.json'):
-                            with open(file_path, 'r') as f:
-                                file_data = json.load(f)
-                                if isinstance(file_data, list):
-                                    all_data.extend(file_data)
-                                else:
-                                    all_data.append(file_data)
+                        elif self.db_type == "json" and filename.endswith(('.json', '.jsonl')):
+                            records = _read_json_records(file_path)
+                            if not (url_prefix or url_contains):
+                                # Unfiltered reads stop once the limit is reached
+                                records = islice(records, max(limit - len(all_data), 0))
+                            all_data.extend(records)
+                            if len(all_data) >= limit and not (url_prefix or url_contains):
+                                break
+                
+                if url_prefix or url_contains:
+                    all_data = [item for item in all_data
+                                if _url_matches(item.get('url'), url, url_prefix, url_contains)]
                 
                 # Apply limit
+                if fields:
+                    return [_project(item, fields) for item in all_data[:limit]]
                 return all_data[:limit]
                 
         except Exception as e:
             logger.error(f"Error retrieving data: {str(e)}")
             return []
     
+    def _get_sqlite_fields(self, cursor, fields, where_sql, params, limit):
+        """Read only the given fields of each row, using json_extract."""
+        columns = ", ".join([_SQL_FIELD_COLUMNS] * len(fields))
+        paths = []
+        for field in fields:
+            path = _json_path(field)
+            paths.extend([path, path])
+        cursor.execute(
+            _SQL_SELECT_FIELDS.format(columns=columns, where=where_sql),
+            tuple(paths) + params + (limit,)
+        )
+        
+        results = []
+        for row in cursor:
+            item = {}
+            for field, json_type, value in zip(fields, row[::2], row[1::2]):
+                if json_type is None:
+                    continue
+                if json_type in ('object', 'array'):
+                    # Objects and arrays come back as JSON text
+                    value = orjson.loads(value)
+                elif json_type in ('true', 'false'):
+                    # Booleans come back as 1/0
+                    value = json_type == 'true'
+                item[field] = value
+            results.append(item)
+        return results
+    
+    def _iter_sqlite_rows(self, url=None, limit=100, batch_size=1000, url_prefix=None, url_contains=None):
+        """Yield batches of raw data_json strings from SQLite using fetchmany."""
+        if not self.initialized:
+            logger.error("Database connection not initialized")
+            return
+        
+        try:
+            cursor = self._get_connection().cursor()
+            cursor.arraysize = batch_size
+            
+            where_sql, params = _sqlite_url_filter(url, url_prefix, url_contains)
+            cursor.execute(
+                _SQL_SELECT_DATA.format(where=where_sql),
+                params + (limit,)
+            )
+            
+            while True:
+                rows = cursor.fetchmany()
+                if not rows:
+                    break
+                yield [row[0] for row in rows]
+                    
+        except sqlite3.Error as e:
+            logger.error(f"Error retrieving data: {str(e)}")
+    
+    def get_field_names(self, url=None, limit=100, url_prefix=None, url_contains=None):
+        """
+        Get the union of the field names of the items a read with the same filters returns.
+        
+        Meant for export headers, so columns missing from the first item are not
+        dropped. SQLite collects the keys with json_each instead of decoding rows.
+        
+        Args:
+            url: Optional URL to filter by (exact match)
+            limit: Maximum number of records to consider
+            url_prefix: Optional URL prefix to filter by (index-backed)
+            url_contains: Optional URL substring to filter by (full scan)
+            
+        Returns:
+            list: Field names in first-seen order
+        """
+        if self.db_type != "sqlite":
+            data = self.get_data(url=url, limit=limit, url_prefix=url_prefix, url_contains=url_contains)
+            return list(dict.fromkeys(key for item in data for key in item))
+        
+        if not self.initialized:
+            logger.error("Database connection not initialized")
+            return []
+        
+        try:
+            cursor = self._get_connection().cursor()
+            where_sql, params = _sqlite_url_filter(url, url_prefix, url_contains)
+            cursor.execute(_SQL_SELECT_FIELD_NAMES.format(where=where_sql), params + (limit,))
+            return [row[0] for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            logger.error(f"Error retrieving field names: {str(e)}")
+            return []
+    
+    def iter_batches(self, url=None, limit=100, batch_size=1000, url_prefix=None, url_contains=None):
+        """
+        Iterate over stored data in batches without loading the whole result set.
+        
+        Args:
+            url: Optional URL to filter by (exact match)
+            limit: Maximum number of records to yield
+            batch_size: Number of rows fetched from the cursor at a time
+            url_prefix: Optional URL prefix to filter by (index-backed)
+            url_contains: Optional URL substring to filter by (full scan)
+            
+        Yields:
+            list: Batches of retrieved data items
+        """
+        if self.db_type != "sqlite":
+            data = self.get_data(url=url, limit=limit, url_prefix=url_prefix, url_contains=url_contains)
+            for i in range(0, len(data), batch_size):
+                yield data[i:i + batch_size]
+            return
+        
+        for rows in self._iter_sqlite_rows(url, limit, batch_size, url_prefix, url_contains):
+            yield [orjson.loads(row) for row in rows]
+    
+    def iter_json_batches(self, url=None, limit=100, batch_size=1000, url_prefix=None, url_contains=None):
+        """
+        Iterate over stored data as JSON-encoded strings.
+        
+        SQLite rows are already stored as JSON and are passed through
+        without being decoded.
+        
+        Args:
+            url: Optional URL to filter by (exact match)
+            limit: Maximum number of records to yield
+            batch_size: Number of rows fetched from the cursor at a time
+            url_prefix: Optional URL prefix to filter by (index-backed)
+            url_contains: Optional URL substring to filter by (full scan)
+            
+        Yields:
+            list: Batches of JSON strings, one per data item
+        """
+        if self.db_type == "sqlite":
+            yield from self._iter_sqlite_rows(url, limit, batch_size, url_prefix, url_contains)
+            return
+        
+        for batch in self.iter_batches(url, limit, batch_size, url_prefix, url_contains):
+            yield [orjson.dumps(item, default=str).decode() for item in batch]
+    
+    def iter_data(self, url=None, limit=100, batch_size=1000, url_prefix=None, url_contains=None):
+        """
+        Iterate over stored data one item at a time.
+        
+        Args:
+            url: Optional URL to filter by (exact match)
+            limit: Maximum number of records to yield
+            batch_size: Number of rows fetched from the cursor at a time
+            url_prefix: Optional URL prefix to filter by (index-backed)
+            url_contains: Optional URL substring to filter by (full scan)
+            
+        Yields:
+            dict: Retrieved data items
+        """
+        for batch in self.iter_batches(url, limit, batch_size, url_prefix, url_contains):
+            yield from batch
+    
+    def get_data_version(self):
+        """
+        Get a cheap key that changes whenever crawled pages are added or updated.
+        
+        Returns:
+            tuple: (total_pages, latest_crawl_date)
+        """
+        try:
+            cursor = self._get_connection().cursor()
+            cursor.execute(_SQL_DATA_VERSION)
+            return tuple(cursor.fetchone())
+        except sqlite3.Error as e:
+            logger.error(f"Database error: {str(e)}")
+            return (0, None)
+    
+    def get_stats(self, url=None, url_prefix=None, url_contains=None):
+        """
+        Get statistics about crawled data (SQLite only).
+        
+        Args:
+            url: Restrict the stats to this exact URL
+            url_prefix: Restrict the stats to URLs starting with this prefix
+            url_contains: Restrict the stats to URLs containing this substring
+        
+        Returns:
+            dict: Total pages, plus top domains and crawl activity by date as
+            parallel column lists ({'domains': [...], 'counts': [...]} and
+            {'dates': [...], 'counts': [...]})
+        """
+        cursor = self._get_connection().cursor()
+        
+        stats = {}
+        
+        try:
+            # Each query filters directly. The app memoizes stats per data
+            # version, so a temp table of matching rows would never be reused
+            where_sql, params = _sqlite_url_filter(url, url_prefix, url_contains)
+            
+            # Total number of pages crawled
+            cursor.execute(_SQL_TOTAL_PAGES.format(where=where_sql), params)
+            stats['total_pages'] = cursor.fetchone()[0]
+            
+            # Top domains
+            cursor.execute(_SQL_TOP_DOMAINS.format(where=where_sql), params)
+            stats['top_domains'] = _columns(cursor.fetchall(), 'domains', 'counts')
+            
+            # Crawl activity over time
+            cursor.execute(_SQL_ACTIVITY_BY_DAY.format(where=where_sql), params)
+            stats['activity_by_date'] = _columns(cursor.fetchall(), 'dates', 'counts')
+        except sqlite3.Error as e:
+            logger.error(f"Database error: {str(e)}")
+            stats['error'] = "Database error occurred"
+        
+        return stats
+    
+    def close_thread_connection(self):
+        """
+        Close the calling thread's SQLite connection, if it opened one.
+        
+        Threads that end before the manager does, such as a crawler's
+        writer thread, call this so their connection is not kept open
+        until close().
+        """
+        conn = getattr(self._local, 'connection', None)
+        if conn is None:
+            return
+        self._local.connection = None
+        with self._connections_lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+        conn.close()
+    
     def close(self):
         """Close database connection."""
         if self.initialized:
-            if self.db_type == "sqlite" and self.connection:
-                self.connection.close()
+            if self.db_type == "sqlite":
+                with self._connections_lock:
+                    for conn in self._connections:
+                        conn.close()
+                    self._connections.clear()
+                self._local = threading.local()
             elif self.db_type == "mongodb" and self.connection:
-                self.connection.close()
\ No newline at end of file
+                self._flush_mongo()
+                self.connection.close()
+            elif self.db_type == "csv":
+                self._flush_csv_writers(close=True)
@@ -97,8 +97,11 @@ def main():
     test_crawler()
     
     # Start the Flask application
-    logger.info("Starting Flask web server")
-    app.run(host='0.0.0.0', port=5000, debug=False)
+    logger.info("Starting web server")
+    from waitress import serve
+    from config import config
+    serve(app, host=config.get("host", "0.0.0.0"), port=config.get("port", 5000),
+          threads=config.get("server_threads", 8))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,6 +1,7 @@
 
 
 import logging
+import time
 from datetime import datetime
 
 class DatabasePipeline:
@@ -11,13 +12,35 @@ class DatabasePipeline:
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
+        self.buffer = []
+        self.batch_size = 100
+        # Seconds a buffered item may wait before the batch is written anyway
+        self.flush_interval = 2.0
+        self._last_flush = time.monotonic()
     
     def open_spider(self, spider):
         """Initialize database connection when spider opens."""
         self.db_manager = getattr(spider, 'db_manager', None)
+        self.batch_size = getattr(spider, 'db_batch_size', self.batch_size)
+        self.flush_interval = getattr(spider, 'db_flush_interval', self.flush_interval)
+        self._last_flush = time.monotonic()
         if not self.db_manager:
             self.logger.warning("No database_manager found in spider. Items won't be saved.")
     
+    def close_spider(self, spider):
+        """Save any buffered items when spider closes."""
+        self.flush()
+    
+    def flush(self):
+        """Save buffered items to the database in one batch."""
+        self._last_flush = time.monotonic()
+        if not self.buffer:
+            return
+        items, self.buffer = self.buffer, []
+        success = self.db_manager.save_many(items)
+        if not success:
+            self.logger.error(f"Failed to save batch of {len(items)} items")
+    
     def process_item(self, item, spider):
         """Process and save item to database."""
         # Convert item to dict
@@ -26,11 +49,13 @@ class DatabasePipeline:
         # Add timestamp
         item_dict['crawl_date'] = datetime.now().isoformat()
         
-        # Save to database if db_manager is available
+        # Queue for saving if db_manager is available; writes go out in batches,
+        # or sooner on slow crawls so items don't sit unsaved for long
         if hasattr(self, 'db_manager') and self.db_manager:
-            success = self.db_manager.save_data(item_dict)
-            if not success:
-                self.logger.error(f"Failed to save item: {item_dict.get('url', 'unknown')}")
+            self.buffer.append(item_dict)
+            if (len(self.buffer) >= self.batch_size
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self.flush()
         
         return item
 
@@ -5,6 +5,10 @@ from scrapy.spiders import CrawlSpider, Rule
 from scrapy.loader import ItemLoader
 from itemloaders.processors import TakeFirst, Join, MapCompose
 import logging
+import re
+
+# Shared by every spider; joins the text nodes of the 'content' field
+_JOIN_LINES = Join('\n')
 
 class GenericItem(scrapy.Item):
     """Generic item that can hold any field."""
@@ -51,9 +55,9 @@ class GenericSpider(CrawlSpider):
         # Initialize rules
         rules = []
         if follow_pattern:
-            rules.append(Rule(LinkExtractor(allow=follow_pattern), follow=True))
+            rules.append(Rule(LinkExtractor(allow=re.compile(follow_pattern)), follow=True))
         if page_pattern:
-            rules.append(Rule(LinkExtractor(allow=page_pattern), callback='parse_item'))
+            rules.append(Rule(LinkExtractor(allow=re.compile(page_pattern)), callback='parse_item'))
         
         # If no patterns provided, follow all links and parse all pages
         if not rules:
@@ -67,6 +71,19 @@ class GenericSpider(CrawlSpider):
             'content': 'body p::text',
         })
         
+        # Work out each field's CSS and processor once instead of per page
+        self._parsed_selectors = []
+        for field, selector in self.item_selectors.items():
+            # Handle special cases for certain fields
+            if selector.endswith('::text'):
+                css_selector = selector.partition('::')[0]
+                # If we want to join multiple text elements
+                processor = _JOIN_LINES if field == 'content' else None
+                self._parsed_selectors.append((field, css_selector, processor))
+            else:
+                # Default handling
+                self._parsed_selectors.append((field, selector, None))
+        
         super().__init__(*args, **kwargs)
         
     def parse_item(self, response):
@@ -79,21 +96,12 @@ class GenericSpider(CrawlSpider):
         # Add URL
         loader.add_value('url', response.url)
         
-        # Add fields based on selectors
-        for field, selector in self.item_selectors.items():
-            # Handle special cases for certain fields
-            if selector.endswith('::text'):
-                selector_parts = selector.split('::')
-                css_selector = selector_parts[0]
-                
-                # If we want to join multiple text elements
-                if field == 'content':
-                    loader.add_css(field, css_selector, Join('\n'))
-                else:
-                    loader.add_css(field, css_selector)
+        # Add fields based on the selectors prepared in __init__
+        for field, css_selector, processor in self._parsed_selectors:
+            if processor is not None:
+                loader.add_css(field, css_selector, processor)
             else:
-                # Default handling
-                loader.add_css(field, selector)
+                loader.add_css(field, css_selector)
                 
         return loader.load_item()
 
@@ -1,10 +1,40 @@
 import logging
+import math
+import queue
+import re
+import socket
+import sys
+import threading
 import time
-from urllib.parse import urlparse, urljoin
-from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from functools import lru_cache
+from urllib.parse import urljoin, urlsplit, urlunsplit
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 import requests
-from bs4 import BeautifulSoup
+import xxhash
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError
+from urllib3.util.retry import Retry
+try:
+    # lexbor-backed parser, much faster than BeautifulSoup's html.parser
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+    import soupsieve
+    from bs4 import BeautifulSoup, FeatureNotFound, SoupStrainer
+    try:
+        import lxml.etree
+        import lxml.html
+    except ImportError:
+        lxml = None
+    try:
+        # CSS selectors translated to XPath once and evaluated by lxml
+        from cssselect import HTMLTranslator, SelectorError
+    except ImportError:
+        HTMLTranslator = None
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
@@ -25,10 +55,374 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Selectors made only of tag/class/id compounds joined by descendant combinators.
+# Their matches always sit inside an element named by the first compound, so
+# BeautifulSoup can skip the rest of the page while parsing.
+_DESCENDANT_SELECTOR_RE = re.compile(r'([a-zA-Z][\w-]*)(?:[.#][\w-]+)*(?:\s+[a-zA-Z*.#][\w.#-]*)*')
+
+# Links to files that are never HTML pages are not worth fetching
+_NON_HTML_EXTENSION_RE = re.compile(
+    r'\.(?:pdf|zip|gz|tgz|rar|7z|tar|exe|dmg|iso|jpe?g|png|gif|webp|svg|ico|bmp|tiff?'
+    r'|mp3|mp4|m4a|wav|avi|mov|mkv|webm|css|js|woff2?|ttf|eot|docx?|xlsx?|pptx?)$',
+    re.IGNORECASE
+)
+
+# Characters that can follow the host in an absolute URL
+_HOST_ENDINGS = ('', '/', '?', '#')
+
+# Responses that are not HTML, or too large, are dropped before the body is read
+ALLOWED_MIME_TYPES = frozenset({'text/html', 'application/xhtml+xml'})
+MAX_PAGE_BYTES = 5 * 1024 * 1024
+_CHUNK_SIZE = 64 * 1024
+
+# Only advertise brotli when it can be decoded; urllib3 and aiohttp both use the brotli package
+try:
+    import brotli
+    ACCEPT_ENCODING = 'gzip, br, deflate'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# Resolved addresses are reused for a while, like aiohttp's ttl_dns_cache
+DNS_CACHE_TTL = 300
+_DNS_CACHE_SIZE = 1024
+_dns_cache = {}
+_dns_cache_lock = threading.Lock()
+
+def _resolve(host, port):
+    """
+    Look up host, reusing the answer for DNS_CACHE_TTL seconds.
+    
+    Returns:
+        list: IP addresses in getaddrinfo order
+        
+    Raises:
+        socket.gaierror: If the lookup fails; failures are not cached
+    """
+    key = (host, port)
+    now = time.monotonic()
+    with _dns_cache_lock:
+        entry = _dns_cache.get(key)
+    if entry and entry[0] > now:
+        return entry[1]
+    
+    infos = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+    addresses = list(dict.fromkeys(sockaddr[0] for _, _, _, _, sockaddr in infos))
+    with _dns_cache_lock:
+        if len(_dns_cache) >= _DNS_CACHE_SIZE:
+            _dns_cache.clear()
+        _dns_cache[key] = (now + DNS_CACHE_TTL, addresses)
+    return addresses
+
+class _CachedDNSConnectionMixin:
+    """
+    urllib3 connection that connects to cached addresses instead of resolving the host.
+    
+    Only the socket target changes; Host headers and TLS verification still
+    use the original host name, which is restored before _new_conn returns.
+    """
+    
+    def _new_conn(self):
+        host = self._dns_host
+        try:
+            addresses = _resolve(host, self.port)
+        except socket.gaierror:
+            # Let urllib3 resolve again and report the failure itself
+            addresses = [host]
+        
+        error = None
+        for address in addresses:
+            self._dns_host = address
+            try:
+                return super()._new_conn()
+            except ConnectTimeoutError as e:
+                # Also covers NewConnectionError (refused, unreachable); try the next address
+                error = e
+            finally:
+                self._dns_host = host
+        
+        # Every cached address failed; look the host up again next time
+        with _dns_cache_lock:
+            _dns_cache.pop((host, self.port), None)
+        raise error
+
+class _CachedDNSHTTPConnection(_CachedDNSConnectionMixin, HTTPConnection):
+    pass
+
+class _CachedDNSHTTPSConnection(_CachedDNSConnectionMixin, HTTPSConnection):
+    pass
+
+class _CachedDNSHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _CachedDNSHTTPConnection
+
+class _CachedDNSHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _CachedDNSHTTPSConnection
+
+class CachedDNSAdapter(HTTPAdapter):
+    """HTTPAdapter whose connections go through the DNS cache; other sessions are unaffected."""
+    
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _CachedDNSHTTPConnectionPool,
+            'https': _CachedDNSHTTPSConnectionPool,
+        }
+
+def _is_acceptable_page(url, content_type, content_length):
+    """
+    Check response headers before reading the body.
+    
+    Args:
+        url: URL being fetched (for logging)
+        content_type: Content-Type header value or None
+        content_length: Content-Length header value or None
+        
+    Returns:
+        bool: True if the body should be read
+    """
+    mime_type = (content_type or '').split(';')[0].strip().lower()
+    # Servers that omit the header are given the benefit of the doubt
+    if mime_type and mime_type not in ALLOWED_MIME_TYPES:
+        logger.info(f"Skipping {url}: content type {mime_type}")
+        return False
+    if content_length and content_length.isdigit() and int(content_length) > MAX_PAGE_BYTES:
+        logger.warning(f"Skipping {url}: Content-Length {content_length} exceeds {MAX_PAGE_BYTES} bytes")
+        return False
+    return True
+
+def _decode(body, encoding):
+    """Decode a page body once, falling back to UTF-8 for missing or unknown charsets."""
+    try:
+        return body.decode(encoding or 'utf-8', errors='replace')
+    except LookupError:
+        return body.decode('utf-8', errors='replace')
+
+@lru_cache(maxsize=65536)
+def _canonicalize(url):
+    """
+    Canonical form of a URL, so trivially different spellings are crawled once.
+    
+    Lowercases the scheme and host, drops the fragment and sorts the query
+    parameters. The path is kept as is, trailing slash included, because
+    relative links on the page are resolved against it; the query parameters
+    are reordered but not re-encoded, so the server sees the same bytes.
+    
+    Args:
+        url: Absolute URL
+        
+    Returns:
+        str: Canonical URL
+    """
+    parts = urlsplit(url)
+    query = '&'.join(sorted(parts.query.split('&'))) if parts.query else ''
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or '/', query, ''))
+
+def _parse_tree(content):
+    """
+    Parse a page once so data and link extraction can share the tree.
+    
+    Returns:
+        LexborHTMLParser tree, or None when selectolax is not installed
+    """
+    return LexborHTMLParser(content) if LexborHTMLParser is not None else None
+
+def _select_texts(content, selectors, tree=None):
+    """
+    Run each CSS selector against the page and collect the matched text.
+    
+    Args:
+        content: HTML content as string
+        selectors: Dict of {data_field: css_selector}
+        tree: Tree from _parse_tree to reuse instead of parsing content again
+        
+    Returns:
+        dict: {data_field: list of stripped texts}
+    """
+    if LexborHTMLParser is not None:
+        if tree is None:
+            tree = LexborHTMLParser(content)
+        return {field: [node.text(strip=True) for node in tree.css(selector)]
+                for field, selector in selectors.items()}
+    
+    if lxml is not None and HTMLTranslator is not None:
+        xpaths = [_compiled_xpath(selector) for selector in selectors.values()]
+        if None not in xpaths:
+            try:
+                tree = lxml.html.fromstring(content)
+            except (lxml.etree.ParserError, ValueError):
+                # Empty document, or str input with an XML encoding declaration
+                # (common on XHTML pages); BeautifulSoup copes with both below
+                tree = None
+            if tree is not None:
+                return {field: [''.join(text.strip() for text in element.itertext()) for element in xpath(tree)]
+                        for field, xpath in zip(selectors, xpaths)}
+    
+    soup = BeautifulSoup(content, _BS_PARSER, parse_only=_strainer_for(tuple(selectors.values())))
+    return {field: [element.get_text(strip=True) for element in _compiled_css(selector).select(soup)]
+            for field, selector in selectors.items()}
+
+@lru_cache(maxsize=256)
+def _compiled_css(selector):
+    """Compile a CSS selector with soupsieve once per process."""
+    return soupsieve.compile(selector)
+
+def _intern_selectors(selectors):
+    """Intern field names and selectors once per crawl; they are hashed for every page."""
+    if not selectors:
+        return selectors
+    return {sys.intern(field): sys.intern(selector) for field, selector in selectors.items()}
+
+@lru_cache(maxsize=256)
+def _compiled_xpath(selector):
+    """
+    Compile a CSS selector to an lxml XPath once per process.
+    
+    Returns:
+        lxml.etree.XPath or None if cssselect cannot translate the selector
+    """
+    try:
+        return lxml.etree.XPath(HTMLTranslator().css_to_xpath(selector))
+    except SelectorError:
+        return None
+
+@lru_cache(maxsize=256)
+def _strainer_for(selectors):
+    """
+    Build a SoupStrainer keeping only the subtrees the selectors can match in.
+    
+    Args:
+        selectors: Tuple of CSS selectors
+        
+    Returns:
+        SoupStrainer or None when some selector needs the whole document
+    """
+    root_tags = set()
+    for selector in selectors:
+        for part in selector.split(','):
+            match = _DESCENDANT_SELECTOR_RE.fullmatch(part.strip())
+            if not match:
+                return None
+            root_tags.add(match.group(1).lower())
+    return SoupStrainer(list(root_tags)) if root_tags else None
+
+def _extract_hrefs(content, tree=None):
+    """Return the href of every <a> tag that has one, in document order."""
+    if LexborHTMLParser is not None:
+        if tree is None:
+            tree = LexborHTMLParser(content)
+        return [node.attributes.get('href') or '' for node in tree.css('a[href]')]
+    
+    if lxml is not None:
+        # The target sees each tag as it is parsed, so no tree is built at all
+        parser = lxml.html.HTMLParser(target=_LinkTarget())
+        parser.feed(content)
+        return parser.close()
+    
+    # The strainer builds only the <a href> tags, not the whole tree
+    soup = BeautifulSoup(content, _BS_PARSER, parse_only=_A_STRAINER)
+    return [a_tag['href'] for a_tag in soup.find_all('a', href=True)]
+
+class _LinkTarget:
+    """lxml parser target that records <a href> values instead of building elements."""
+    
+    def __init__(self):
+        self.hrefs = []
+    
+    def start(self, tag, attrib):
+        if tag == 'a':
+            href = attrib.get('href')
+            if href is not None:
+                self.hrefs.append(href)
+    
+    def close(self):
+        return self.hrefs
+
+if LexborHTMLParser is None:
+    _A_STRAINER = SoupStrainer('a', href=True)
+    # lxml's tree builder is far faster than the pure-Python html.parser
+    try:
+        BeautifulSoup('', 'lxml')
+        _BS_PARSER = 'lxml'
+    except FeatureNotFound:
+        _BS_PARSER = 'html.parser'
+
+class VisitedSet:
+    """
+    Bloom filter for visited URLs on very large crawls.
+    
+    Uses about 1.2 bytes per URL at a 1% false-positive rate instead of
+    keeping every URL string. A false positive means a page is wrongly
+    treated as already visited and skipped; URLs are never visited twice.
+    """
+    
+    def __init__(self, capacity=5_000_000, error_rate=0.01):
+        """
+        Size the filter for the expected number of URLs.
+        
+        Args:
+            capacity: Number of URLs the false-positive rate is sized for
+            error_rate: Target false-positive rate at capacity
+        """
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self._count = 0
+    
+    def _positions(self, url):
+        # Double hashing: k positions from the two halves of one 128-bit hash
+        digest = xxhash.xxh3_128_intdigest(url.encode())
+        h1, h2 = digest >> 64, (digest & 0xFFFFFFFFFFFFFFFF) | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+    
+    def __contains__(self, url):
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(url))
+    
+    def add(self, url):
+        bits = self.bits
+        added = False
+        for pos in self._positions(url):
+            mask = 1 << (pos & 7)
+            if not bits[pos >> 3] & mask:
+                bits[pos >> 3] |= mask
+                added = True
+        if added:
+            self._count += 1
+    
+    def __len__(self):
+        """Approximate number of distinct URLs added."""
+        return self._count
+
+class HashedVisitedSet:
+    """
+    Visited set storing a 64-bit xxhash of each URL instead of the URL itself.
+    
+    A small int takes far less memory than a long URL string and is cheaper
+    to hash. Two distinct URLs collide with odds of about n^2 / 2^65, under
+    one in a hundred thousand for ten million URLs.
+    """
+    
+    def __init__(self):
+        self._hashes = set()
+    
+    def __contains__(self, url):
+        return xxhash.xxh3_64_intdigest(url.encode()) in self._hashes
+    
+    def add(self, url):
+        self._hashes.add(xxhash.xxh3_64_intdigest(url.encode()))
+    
+    def __len__(self):
+        return len(self._hashes)
+
 class WebCrawler:
     """A versatile web crawler that can handle both static and dynamic websites."""
     
-    def __init__(self, database_manager=None, use_selenium=False, max_workers=5):
+    # Sent with every request; set once on the HTTP sessions, not built per page
+    _DEFAULT_HEADERS = {'User-Agent': USER_AGENT, 'Accept-Encoding': ACCEPT_ENCODING}
+    
+    def __init__(self, database_manager=None, use_selenium=False, max_workers=5, write_batch_size=100,
+                 visited_capacity=None, wait_selector=None, respect_robots=False, write_flush_interval=1.0):
         """
         Initialize the crawler with optional components.
         
@@ -36,31 +430,123 @@ class WebCrawler:
             database_manager: Handler for database operations
             use_selenium: Whether to use Selenium for JavaScript-heavy sites
             max_workers: Maximum number of concurrent crawling threads
+            write_batch_size: Number of extracted items buffered before writing to the database
+            visited_capacity: Expected number of URLs for very large crawls; when set,
+                visited URLs are tracked in a VisitedSet Bloom filter instead of a set
+            wait_selector: CSS selector Selenium waits for before reading a page;
+                by default it waits for document.readyState to be complete
+            respect_robots: Skip URLs that robots.txt disallows; each host's
+                robots.txt is fetched once and cached
+            write_flush_interval: Seconds after which a partly filled batch is written anyway
         """
         self.database_manager = database_manager
         self.use_selenium = use_selenium
         self.max_workers = max_workers
-        self.visited_urls = set()
+        self.write_batch_size = write_batch_size
+        self.write_flush_interval = write_flush_interval
+        self.visited_capacity = visited_capacity
+        self.wait_selector = wait_selector
+        self.respect_robots = respect_robots
+        self.visited_urls = self._new_visited_set()
+        # Set by stop(); running crawls return after the pages already being fetched
+        self.stopped = False
+        
+        # One keep-alive session so pages on the same host reuse connections
+        self.session = requests.Session()
+        self.session.headers.update(self._DEFAULT_HEADERS)
+        # The adapter resolves each host once per DNS_CACHE_TTL instead of on every new connection
+        adapter = CachedDNSAdapter(
+            pool_connections=max_workers,
+            pool_maxsize=max_workers * 4,
+            max_retries=Retry(total=2, backoff_factor=0.2)
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        # Extracted items waiting to be written in one batch
+        self._pending_writes = []
+        self._pending_lock = threading.Lock()
+        
+        # Batches are saved by a background thread so crawling never waits on the database
+        self._write_queue = queue.Queue()
+        self._writer = None
+        if self.database_manager:
+            self._writer = threading.Thread(target=self._write_loop, name='crawler-db-writer', daemon=True)
+            self._writer.start()
         
         # Configure Selenium if enabled
         if self.use_selenium:
             self._setup_selenium()
     
+    def _new_visited_set(self):
+        """URL hashes by default, Bloom filter when visited_capacity is set."""
+        if self.visited_capacity:
+            return VisitedSet(self.visited_capacity)
+        return HashedVisitedSet()
+    
     def _setup_selenium(self):
-        """Set up the Selenium WebDriver with Chrome."""
+        """
+        Set up a pool of Selenium Chrome WebDrivers.
+        
+        One driver is started here; more are started on demand, up to
+        max_workers, so parallel crawls render pages concurrently.
+        """
+        self._driver_pool = queue.Queue()
+        self._drivers = []
+        self._drivers_lock = threading.Lock()
+        # Lowered to the running count if starting another driver fails
+        self._max_drivers = self.max_workers
         try:
-            chrome_options = Options()
-            chrome_options.add_argument("--headless")
-            chrome_options.add_argument("--no-sandbox")
-            chrome_options.add_argument("--disable-dev-shm-usage")
+            self._chrome_options = Options()
+            self._chrome_options.add_argument("--headless")
+            self._chrome_options.add_argument("--no-sandbox")
+            self._chrome_options.add_argument("--disable-dev-shm-usage")
             
-            service = Service(ChromeDriverManager().install())
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
+            self._driver_service_path = ChromeDriverManager().install()
+            self._driver_pool.put(self._start_driver())
             logger.info("Selenium WebDriver initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize Selenium WebDriver: {str(e)}")
             self.use_selenium = False
     
+    def _start_driver(self):
+        """Start a headless Chrome and register it with the pool."""
+        service = Service(self._driver_service_path)
+        driver = webdriver.Chrome(service=service, options=self._chrome_options)
+        self._drivers.append(driver)
+        return driver
+    
+    def _acquire_driver(self):
+        """
+        Take an idle driver, starting another while fewer than max_workers exist.
+        
+        Returns:
+            A WebDriver, or None if no driver is running and none could be started
+        """
+        try:
+            return self._driver_pool.get_nowait()
+        except queue.Empty:
+            pass
+        with self._drivers_lock:
+            if len(self._drivers) < self._max_drivers:
+                try:
+                    return self._start_driver()
+                except WebDriverException as e:
+                    logger.error(f"Failed to start another WebDriver: {str(e)}")
+                    # Share the drivers already running instead of retrying
+                    self._max_drivers = len(self._drivers)
+            if not self._drivers:
+                return None
+        return self._driver_pool.get()
+    
+    def _wait_for_page(self, driver):
+        """Wait until the page is ready instead of sleeping a fixed time."""
+        if self.wait_selector:
+            condition = EC.presence_of_element_located((By.CSS_SELECTOR, self.wait_selector))
+        else:
+            condition = lambda d: d.execute_script("return document.readyState") == "complete"
+        WebDriverWait(driver, 10).until(condition)
+    
     def _get_page_content(self, url):
         """
         Get the page content using either requests or Selenium based on configuration.
@@ -71,42 +557,75 @@ class WebCrawler:
         Returns:
             tuple: (page_content, success_status)
         """
+        if not self._allowed_by_robots(url):
+            return None, False
+        
         try:
             if self.use_selenium:
+                driver = self._acquire_driver()
+                if driver is None:
+                    return self._fetch_html(url)
                 try:
-                    self.driver.get(url)
-                    # Wait for the page to load
-                    WebDriverWait(self.driver, 10).until(
-                        EC.presence_of_element_located((By.TAG_NAME, "body"))
-                    )
-                    # Let JavaScript execute
-                    time.sleep(2)
-                    page_content = self.driver.page_source
+                    driver.get(url)
+                    # Wait for the page (or the configured element) to load
+                    self._wait_for_page(driver)
+                    page_content = driver.page_source
                     return page_content, True
                 except (TimeoutException, WebDriverException) as e:
                     logger.error(f"Selenium error for {url}: {str(e)}")
                     # Fall back to requests
-                    response = requests.get(url, timeout=10)
-                    if response.status_code == 200:
-                        return response.text, True
-                    else:
-                        logger.warning(f"Failed to fetch {url}: Status code {response.status_code}")
-                        return None, False
+                    return self._fetch_html(url)
+                finally:
+                    self._driver_pool.put(driver)
             else:
                 # Use requests for static sites
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-                }
-                response = requests.get(url, headers=headers, timeout=10)
-                if response.status_code == 200:
-                    return response.text, True
-                else:
-                    logger.warning(f"Failed to fetch {url}: Status code {response.status_code}")
-                    return None, False
+                return self._fetch_html(url)
         except requests.RequestException as e:
             logger.error(f"Request error for {url}: {str(e)}")
             return None, False
     
+    def _allowed_by_robots(self, url):
+        """Check robots.txt for url when respect_robots is enabled."""
+        if not self.respect_robots:
+            return True
+        
+        # Import here; crawler_utils keeps the per-host robots.txt cache
+        from crawler_utils import can_fetch
+        if can_fetch(url):
+            return True
+        logger.info(f"Skipping {url}: disallowed by robots.txt")
+        return False
+    
+    def _fetch_html(self, url):
+        """
+        Fetch a page with the session, streaming the body.
+        
+        The Content-Type and Content-Length headers are checked before the
+        body is read, and reading stops once MAX_PAGE_BYTES is exceeded.
+        
+        Args:
+            url: The URL to fetch
+            
+        Returns:
+            tuple: (page_content, success_status)
+        """
+        with self.session.get(url, timeout=10, stream=True) as response:
+            if response.status_code != 200:
+                logger.warning(f"Failed to fetch {url}: Status code {response.status_code}")
+                return None, False
+            if not _is_acceptable_page(url, response.headers.get('Content-Type'),
+                                       response.headers.get('Content-Length')):
+                return None, False
+            
+            body = bytearray()
+            for chunk in response.iter_content(chunk_size=_CHUNK_SIZE):
+                body += chunk
+                if len(body) > MAX_PAGE_BYTES:
+                    logger.warning(f"Skipping {url}: larger than {MAX_PAGE_BYTES} bytes")
+                    return None, False
+            
+            return _decode(body, response.encoding), True
+    
     def extract_data(self, url, selectors):
         """
         Extract data from a URL using provided CSS selectors.
@@ -122,26 +641,67 @@ class WebCrawler:
         if not success:
             return None
         
+        return self._extract_data_from(url, content, selectors)
+    
+    def _extract_data_from(self, url, content, selectors, tree=None):
+        """Build the data item for already fetched page content and queue it for storage."""
         data = {'url': url}
-        soup = BeautifulSoup(content, 'html.parser')
-        
-        for field, selector in selectors.items():
-            elements = soup.select(selector)
-            if elements:
-                # If multiple elements match, get their text content
-                data[field] = [element.get_text(strip=True) for element in elements]
-                # If only one element, return string instead of list
-                if len(data[field]) == 1:
-                    data[field] = data[field][0]
+        
+        for field, texts in _select_texts(content, selectors, tree).items():
+            if texts:
+                # If multiple elements match, keep their text content as a list;
+                # if only one element, return string instead of list
+                data[field] = texts[0] if len(texts) == 1 else texts
             else:
                 data[field] = None
         
-        # Store the extracted data if a database manager is provided
+        # Queue the extracted data for storage if a database manager is provided
         if self.database_manager:
-            self.database_manager.save_data(data)
+            with self._pending_lock:
+                self._pending_writes.append(data)
+                should_flush = len(self._pending_writes) >= self.write_batch_size
+            if should_flush:
+                self._queue_pending()
         
         return data
     
+    def _queue_pending(self):
+        """Hand the buffered items to the writer thread without waiting for them to be saved."""
+        with self._pending_lock:
+            items, self._pending_writes = self._pending_writes, []
+        if items:
+            self._write_queue.put(items)
+    
+    def _write_loop(self):
+        """Save queued batches until close() sends None; runs on the writer thread."""
+        try:
+            while True:
+                try:
+                    items = self._write_queue.get(timeout=self.write_flush_interval)
+                except queue.Empty:
+                    # Nothing filled a batch for a while; write what has trickled in
+                    self._queue_pending()
+                    continue
+                
+                try:
+                    if items is None:
+                        return
+                    self.database_manager.save_many(items)
+                except Exception as e:
+                    logger.error(f"Error saving {len(items)} items: {str(e)}")
+                finally:
+                    self._write_queue.task_done()
+        finally:
+            # The database manager outlives this crawler; don't leave this thread's connection open
+            self.database_manager.close_thread_connection()
+    
+    def flush(self):
+        """Write any buffered extracted data to the database and wait until it is saved."""
+        if self._writer is None:
+            return
+        self._queue_pending()
+        self._write_queue.join()
+    
     def extract_links(self, url, restrict_domain=True):
         """
         Extract all links from a webpage.
@@ -157,26 +717,79 @@ class WebCrawler:
         if not success:
             return []
         
-        soup = BeautifulSoup(content, 'html.parser')
-        base_domain = urlparse(url).netloc if restrict_domain else None
+        return self._extract_links_from(url, content, restrict_domain)
+    
+    def _extract_links_from(self, url, content, restrict_domain=True, tree=None):
+        """Collect the crawlable links in already fetched page content."""
+        parts = urlsplit(url)
+        base_domain = parts.netloc.lower()
+        base_prefix = f"{parts.scheme.lower()}://{base_domain}"
         
         links = []
-        for a_tag in soup.find_all('a', href=True):
-            href = a_tag['href']
-            full_url = urljoin(url, href)
+        for href in _extract_hrefs(content, tree):
+            if '/.' in href:
+                # Dot segments need urljoin to be resolved
+                full_url = None
+            elif href[:1] == '/' and href[1:2] != '/':
+                # Root-relative links stay on this host; no urljoin or urlparse needed
+                full_url = _canonicalize(base_prefix + href)
+            elif restrict_domain and href.startswith(('http://', 'https://')):
+                # For absolute links it is enough to compare the host right after the scheme
+                start = href.index('//') + 2
+                host = href[start:start + len(base_domain) + 1]
+                if host[:len(base_domain)].lower() != base_domain or host[len(base_domain):] not in _HOST_ENDINGS:
+                    continue
+                full_url = _canonicalize(href)
+            else:
+                full_url = None
             
-            # Filter out non-HTTP(S) URLs and same-domain restriction if enabled
-            if not full_url.startswith(('http://', 'https://')):
-                continue
+            if full_url is None:
+                full_url = _canonicalize(urljoin(url, href))
                 
-            if restrict_domain and urlparse(full_url).netloc != base_domain:
+                # Filter out non-HTTP(S) URLs and same-domain restriction if enabled
+                if not full_url.startswith(('http://', 'https://')):
+                    continue
+                    
+                if restrict_domain and urlsplit(full_url).netloc != base_domain:
+                    continue
+            
+            # Skip downloads such as PDFs, archives and images without fetching them;
+            # canonical URLs have no fragment, so the last path segment ends at '?'
+            last_segment = full_url.partition('?')[0].rpartition('/')[2].partition(';')[0]
+            if _NON_HTML_EXTENSION_RE.search(last_segment):
                 continue
                 
             links.append(full_url)
             
         return links
     
-    def crawl(self, start_url, max_depth=3, selectors=None, restrict_domain=True):
+    def _process(self, url, selectors, restrict_domain, follow_links=True):
+        """
+        Fetch and parse a page once, extracting both its data and its links.
+        
+        Args:
+            url: The URL to process
+            selectors: Dict of {data_field: css_selector}, or None to skip data extraction
+            restrict_domain: Whether to restrict links to the same domain
+            follow_links: Whether to collect links (False at the maximum depth)
+            
+        Returns:
+            tuple: (data dict or None, list of extracted URLs)
+        """
+        content, success = self._get_page_content(url)
+        if not success:
+            return None, []
+        
+        return self._process_content(url, content, selectors, restrict_domain, follow_links)
+    
+    def _process_content(self, url, content, selectors, restrict_domain, follow_links=True):
+        """Extract data and links from already fetched page content off one parsed tree."""
+        tree = _parse_tree(content)
+        data = self._extract_data_from(url, content, selectors, tree) if selectors else None
+        links = self._extract_links_from(url, content, restrict_domain, tree) if follow_links else []
+        return data, links
+    
+    def crawl(self, start_url, max_depth=3, selectors=None, restrict_domain=True, progress_callback=None):
         """
         Crawl a website starting from the given URL.
         
@@ -185,15 +798,18 @@ class WebCrawler:
             max_depth: Maximum depth to crawl
             selectors: Dict of {data_field: css_selector} for data extraction
             restrict_domain: Whether to restrict crawling to the same domain
+            progress_callback: Optional callable receiving the number of pages crawled so far
             
         Returns:
             list: All extracted data items
         """
+        selectors = _intern_selectors(selectors)
+        start_url = _canonicalize(start_url)
         all_data = []
-        to_visit = [(start_url, 0)]  # (url, depth)
+        to_visit = deque([(start_url, 0)])  # (url, depth)
         
-        while to_visit:
-            url, depth = to_visit.pop(0)
+        while to_visit and not self.stopped:
+            url, depth = to_visit.popleft()
             
             # Skip if already visited or exceeded max depth
             if url in self.visited_urls or depth > max_depth:
@@ -202,24 +818,135 @@ class WebCrawler:
             logger.info(f"Crawling: {url} (depth: {depth})")
             self.visited_urls.add(url)
             
-            # Extract data if selectors are provided
-            if selectors:
-                data = self.extract_data(url, selectors)
-                if data:
-                    all_data.append(data)
+            # Fetch the page once for its data and, if not at max depth, its links
+            data, links = self._process(url, selectors, restrict_domain, depth < max_depth)
+            if data:
+                all_data.append(data)
+            
+            for link in links:
+                if link not in self.visited_urls:
+                    to_visit.append((link, depth + 1))
             
-            # If not at max depth, extract links and add to queue
-            if depth < max_depth:
-                links = self.extract_links(url, restrict_domain)
-                for link in links:
-                    if link not in self.visited_urls:
-                        to_visit.append((link, depth + 1))
+            if progress_callback:
+                progress_callback(len(self.visited_urls))
         
+        # Write out whatever is still buffered; close() does the same on error paths
+        self.flush()
         return all_data
     
     def parallel_crawl(self, start_url, max_depth=3, selectors=None, restrict_domain=True):
         """
-        Crawl a website in parallel using a thread pool.
+        Crawl a website concurrently.
+        
+        Static sites are fetched with asyncio and aiohttp, keeping up to
+        max_workers requests in flight on one thread. With Selenium enabled
+        pages are rendered by the browser, so a thread pool is used instead.
+        
+        Args:
+            start_url: The starting URL
+            max_depth: Maximum depth to crawl
+            selectors: Dict of {data_field: css_selector} for data extraction
+            restrict_domain: Whether to restrict crawling to the same domain
+            
+        Returns:
+            list: All extracted data items
+        """
+        selectors = _intern_selectors(selectors)
+        start_url = _canonicalize(start_url)
+        if self.use_selenium:
+            return self._threaded_crawl(start_url, max_depth, selectors, restrict_domain)
+        
+        import asyncio
+        all_data = asyncio.run(self._acrawl(start_url, max_depth, selectors, restrict_domain))
+        self.flush()
+        return all_data
+    
+    async def _afetch(self, session, url):
+        """
+        Fetch a page with aiohttp.
+        
+        Returns:
+            str: Page content, or None if the request failed
+        """
+        import asyncio
+        import aiohttp
+        
+        try:
+            async with session.get(url) as response:
+                if response.status != 200:
+                    logger.warning(f"Failed to fetch {url}: Status code {response.status}")
+                    return None
+                if not _is_acceptable_page(url, response.headers.get('Content-Type'),
+                                           response.headers.get('Content-Length')):
+                    return None
+                
+                body = bytearray()
+                async for chunk in response.content.iter_chunked(_CHUNK_SIZE):
+                    body += chunk
+                    if len(body) > MAX_PAGE_BYTES:
+                        logger.warning(f"Skipping {url}: larger than {MAX_PAGE_BYTES} bytes")
+                        return None
+                return _decode(body, response.charset)
+        except (aiohttp.ClientError, asyncio.TimeoutError, UnicodeDecodeError) as e:
+            logger.error(f"Request error for {url}: {str(e)}")
+        return None
+    
+    async def _acrawl(self, start_url, max_depth, selectors, restrict_domain):
+        """Breadth-first crawl run by max_workers coroutines sharing one aiohttp session."""
+        import asyncio
+        import aiohttp
+        
+        all_data = []
+        visited_urls = self._new_visited_set()
+        visited_urls.add(start_url)
+        to_visit = asyncio.Queue()
+        to_visit.put_nowait((start_url, 0))  # (url, depth)
+        
+        async def worker(session):
+            while True:
+                url, depth = await to_visit.get()
+                try:
+                    # After stop() the remaining queue is drained without fetching
+                    if self.stopped:
+                        continue
+                    logger.info(f"Crawling: {url} (depth: {depth})")
+                    # robots.txt lookups are blocking, keep them off the event loop
+                    if self.respect_robots and not await asyncio.to_thread(self._allowed_by_robots, url):
+                        continue
+                    # Each page is fetched once for both data and links
+                    content = await self._afetch(session, url)
+                    if content is None:
+                        continue
+                    
+                    data, links = self._process_content(url, content, selectors, restrict_domain,
+                                                        depth < max_depth)
+                    if data:
+                        all_data.append(data)
+                    
+                    for link in links:
+                        if link not in visited_urls:
+                            visited_urls.add(link)
+                            to_visit.put_nowait((link, depth + 1))
+                except Exception as e:
+                    logger.error(f"Error crawling {url}: {str(e)}")
+                finally:
+                    to_visit.task_done()
+        
+        connector = aiohttp.TCPConnector(limit=100, limit_per_host=self.max_workers, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=10)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                         headers=self._DEFAULT_HEADERS) as session:
+            workers = [asyncio.create_task(worker(session)) for _ in range(self.max_workers)]
+            await to_visit.join()
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        
+        return all_data
+    
+    def _threaded_crawl(self, start_url, max_depth=3, selectors=None, restrict_domain=True):
+        """
+        Crawl a website in parallel using a thread pool (used with Selenium).
         
         Args:
             start_url: The starting URL
@@ -231,8 +958,8 @@ class WebCrawler:
             list: All extracted data items
         """
         all_data = []
-        to_visit = [(start_url, 0)]  # (url, depth)
-        visited_urls = set()
+        to_visit = deque([(start_url, 0)])  # (url, depth)
+        visited_urls = self._new_visited_set()
         
         def process_url(url_depth):
             url, depth = url_depth
@@ -243,40 +970,54 @@ class WebCrawler:
                 
             logger.info(f"Crawling: {url} (depth: {depth})")
             
-            # Extract data if selectors are provided
-            data = None
-            if selectors:
-                data = self.extract_data(url, selectors)
-            
-            # If not at max depth, extract links
-            new_urls = []
-            if depth < max_depth:
-                links = self.extract_links(url, restrict_domain)
-                for link in links:
-                    if link not in visited_urls:
-                        visited_urls.add(link)
-                        new_urls.append((link, depth + 1))
-            
-            return (data, new_urls)
+            # One fetch for data and links; the main thread dedupes the links
+            data, links = self._process(url, selectors, restrict_domain, depth < max_depth)
+            return (data, depth, links)
         
         visited_urls.add(start_url)
         
         with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            while to_visit:
-                # Process a batch of URLs
-                batch = [to_visit.pop(0) for _ in range(min(self.max_workers, len(to_visit)))]
-                results = executor.map(process_url, batch)
+            in_flight = set()
+            while (to_visit and not self.stopped) or in_flight:
+                # Keep every worker busy; a slow page only holds up its own worker
+                while to_visit and len(in_flight) < self.max_workers and not self.stopped:
+                    in_flight.add(executor.submit(process_url, to_visit.popleft()))
                 
-                for result in results:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
                     if result:
-                        data, new_urls = result
+                        data, depth, links = result
                         if data:
                             all_data.append(data)
-                        to_visit.extend(new_urls)
+                        # Only this thread reads or writes visited_urls
+                        for link in links:
+                            if link not in visited_urls:
+                                visited_urls.add(link)
+                                to_visit.append((link, depth + 1))
         
+        self.flush()
         return all_data
     
+    def stop(self):
+        """Ask a running crawl to return once the pages already being fetched are done."""
+        self.stopped = True
+    
     def close(self):
-        """Clean up resources."""
-        if self.use_selenium and hasattr(self, 'driver'):
-            self.driver.quit()
\ No newline at end of file
+        """
+        Clean up resources.
+        
+        Call this only once the crawl has returned; it stops the database
+        writer thread. Use stop() to end a crawl that is still running.
+        """
+        self.flush()
+        if self._writer is not None:
+            self._write_queue.put(None)
+            self._writer.join()
+            self._writer = None
+        self.session.close()
+        if self.use_selenium:
+            with self._drivers_lock:
+                drivers, self._drivers = self._drivers, []
+            for driver in drivers:
+                driver.quit()
\ No newline at end of file